@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'rest_framework',
     'rest_framework.authtoken',
@@ -47,12 +48,18 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Outermost after security: the latency it records covers the rest
+    'core.middleware.RequestMetricsMiddleware',
+    # Before anything that reads or changes the response body
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Innermost, in the thread of the view: see core.profiling
+    'core.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -81,11 +88,68 @@ WSGI_APPLICATION = 'app.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # Stock PostgreSQL backend with a connection pool
+        'ENGINE': 'core.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # CONN_MAX_AGE stays 0: Django closes its connection after each
+        # request, which gives it back to the pool instead.
+        'POOL': {
+            # Connections kept open between requests, 0 disables the pool
+            'SIZE': int(os.environ.get('DB_POOL_SIZE', 10)),
+            # Extra connections opened under load, closed once returned
+            'MAX_OVERFLOW': int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10)),
+            # Seconds to wait for a connection once all are in use
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            # Connections idle for longer are checked with a SELECT 1
+            'HEALTH_CHECK_AFTER': int(
+                os.environ.get('DB_POOL_HEALTH_CHECK_AFTER', 10)),
+            # Connections idle for longer are closed
+            'IDLE_TIMEOUT': int(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300)),
+            # Seconds before a connection is closed and replaced
+            'MAX_LIFETIME': int(
+                os.environ.get('DB_POOL_MAX_LIFETIME', 3600)),
+        },
+    }
+}
+
+# Read replicas of the default database: comma separated hosts in
+# DB_REPLICA_HOSTS, and optionally their database names in the same
+# order in DB_REPLICA_NAMES (DB_NAME otherwise). GET requests of views
+# using core.routers.ReplicaReadMixin read from them. Tests run them
+# as mirrors of the test database.
+DATABASE_REPLICAS = []
+_replica_hosts = list(filter(None, os.environ.get(
+    'DB_REPLICA_HOSTS', '').split(',')))
+_replica_names = os.environ.get('DB_REPLICA_NAMES', '').split(',')
+for number, host in enumerate(_replica_hosts):
+    name = _replica_names[number] if number < len(_replica_names) else ''
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'NAME': name.strip() or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# The default local memory cache is per process. Point CACHE_BACKEND and
+# CACHE_LOCATION at a shared cache (memcached, redis...) when running
+# several processes, so cache invalidation reaches all of them.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -93,6 +157,15 @@ DATABASES = {
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
+# core.hashing.PBKDF2PasswordHasher is Django's PBKDF2 with a
+# configurable work factor (PASSWORD_PBKDF2_ITERATIONS below)
+PASSWORD_HASHERS = [
+    'core.hashing.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -138,4 +211,161 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # JSON is read and written with orjson (when installed), which is
+    # several times faster than the stdlib json module on big lists.
+    # See `python manage.py benchmark_renderers`.
+    # MessagePack is picked with Accept / Content-Type:
+    # application/msgpack, for internal services.
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'core.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'core.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Cache used by user.authentication.CachedTokenAuthentication to skip
+# the token -> user query. LocMemTokenCache lives in each process;
+# switch to DjangoTokenCache with a shared cache backend when running
+# several processes so invalidation reaches all of them.
+TOKEN_AUTH_CACHE = {
+    'BACKEND': 'user.authentication.LocMemTokenCache',
+    'OPTIONS': {
+        'timeout': int(os.environ.get('TOKEN_AUTH_CACHE_TIMEOUT', 60)),
+        'max_size': int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 10000)),
+    },
+}
+
+# Cache alias and timeout (seconds) for the per-user recipe responses
+# cached by recipe.cache.ResponseCacheMixin
+RECIPE_CACHE_ALIAS = 'default'
+RECIPE_CACHE_TIMEOUT = int(os.environ.get('RECIPE_CACHE_TIMEOUT', 300))
+
+# Default number of recipes per page on the recipe list
+RECIPE_PAGE_SIZE = int(os.environ.get('RECIPE_PAGE_SIZE', 50))
+# Largest page a client can request with ?page_size= on the recipe list
+RECIPE_MAX_PAGE_SIZE = int(os.environ.get('RECIPE_MAX_PAGE_SIZE', 200))
+
+# Delta sync (/api/recipe/recipes/changes/): most changes returned per
+# call, and how old (seconds) a change must be before it is returned so
+# that transactions still in flight are not skipped.
+RECIPE_SYNC_MAX_CHANGES = int(os.environ.get('RECIPE_SYNC_MAX_CHANGES', 500))
+RECIPE_SYNC_SETTLE_SECONDS = float(
+    os.environ.get('RECIPE_SYNC_SETTLE_SECONDS', 1)
+)
+
+# Most recipes accepted in one call of the bulk endpoints
+RECIPE_BULK_MAX_BATCH_SIZE = int(
+    os.environ.get('RECIPE_BULK_MAX_BATCH_SIZE', 1000)
+)
+
+# Rows fetched per round trip when streaming a recipe export
+RECIPE_EXPORT_CHUNK_SIZE = int(os.environ.get('RECIPE_EXPORT_CHUNK_SIZE', 2000))
+
+# Response compression (core.middleware.CompressionMiddleware).
+# Encodings in order of preference; br and zstd are only used when the
+# brotli / zstandard packages are installed.
+COMPRESSION_ENCODINGS = [
+    encoding.strip() for encoding in
+    os.environ.get('COMPRESSION_ENCODINGS', 'br,zstd,gzip').split(',')
+]
+# Bodies smaller than this (bytes) are sent as they are
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+# Fast levels: API responses are compressed on the fly
+COMPRESSION_LEVELS = {
+    'gzip': int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6)),
+    'br': int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4)),
+    'zstd': int(os.environ.get('COMPRESSION_ZSTD_LEVEL', 3)),
+}
+# Content types that are compressed (prefixes). HTML pages, which hold
+# CSRF tokens, are left out (BREACH). Streaming responses (the CSV and
+# NDJSON exports) are never compressed.
+COMPRESSION_CONTENT_TYPES = (
+    'application/json',
+    'application/msgpack',
+    'application/vnd.oai.openapi',
+    'text/plain',
+)
+# Cache for compressed bodies of responses with a strong ETag
+COMPRESSION_CACHE_ALIAS = 'default'
+COMPRESSION_CACHE_TIMEOUT = int(
+    os.environ.get('COMPRESSION_CACHE_TIMEOUT', 300)
+)
+
+# Password hashing (core.hashing). PBKDF2 iterations: Django 3.2's
+# default is 260000; see `python manage.py benchmark_hashers` for the
+# time per hash of other values. Stored hashes are upgraded on login.
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 260000)
+)
+# Passwords the signup and token views hash at once per process, about
+# the number of CPUs. Past that, callers wait PASSWORD_HASHING_TIMEOUT
+# seconds for a slot, then get a 429 with Retry-After:
+# PASSWORD_HASHING_RETRY_AFTER.
+PASSWORD_HASHING_CONCURRENCY = int(
+    os.environ.get('PASSWORD_HASHING_CONCURRENCY', os.cpu_count() or 1)
+)
+PASSWORD_HASHING_TIMEOUT = float(
+    os.environ.get('PASSWORD_HASHING_TIMEOUT', 0.5)
+)
+PASSWORD_HASHING_RETRY_AFTER = int(
+    os.environ.get('PASSWORD_HASHING_RETRY_AFTER', 1)
+)
+# Seconds a user's reads stay on the primary after a write request, so
+# they don't read older data from a lagging replica
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+# Cache alias remembering the users pinned to the primary. Must be
+# shared by every process (e.g. Redis) when there are replicas.
+REPLICA_STICKY_CACHE_ALIAS = 'default'
+
+
+# Most SQL queries a request to each endpoint (URL name) should make,
+# whatever the number of recipes involved. core.metrics counts the
+# requests going over, and the recipe and user tests assert them with
+# core.testing.QueryBudgetMixin. Each includes the token lookup of a
+# token cache miss.
+QUERY_BUDGETS = {
+    'recipe:recipe-list': 4,
+    'recipe:recipe-detail': 4,
+    'recipe:recipe-stats': 2,
+    'recipe:recipe-changes': 3,
+    # The rows are read while streaming, after the request is measured
+    'recipe:recipe-export': 1,
+    'recipe:recipe-bulk': 4,
+    'recipe:recipe-bulk-delete': 7,
+    'user:create': 2,
+    'user:token': 5,
+    'user:me': 3,
 }
+
+# Prometheus metrics (core.prometheus), served at /metrics. Set the
+# PROMETHEUS_MULTIPROC_DIR environment variable to a directory shared by
+# the workers to serve the sum of every worker process.
+# /metrics is closed by default. With METRICS_TOKEN set, every scrape
+# must send it as a bearer token. Without one, only the addresses in
+# METRICS_ALLOWED_IPS (comma separated, loopback by default) may read
+# it; REMOTE_ADDR is checked, i.e. the proxy's address behind one.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = [
+    address.strip() for address in
+    os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+    if address.strip()
+]
+# Seconds between two copies of a process' pool stats to the metrics
+METRICS_POOL_INTERVAL = int(os.environ.get('METRICS_POOL_INTERVAL', 5))
+
+# Request profiling (core.profiling). Requests with a signed X-Profile
+# header (`python manage.py profiling_header`) are always profiled.
+# Share of the other requests profiled at random, 0 for none
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+# Seconds an X-Profile header value stays valid
+PROFILING_SIGNATURE_MAX_AGE = 3600
+# Functions stored per profile, those with the most own time
+PROFILING_TOP_FUNCTIONS = 30
+# Profiles kept, older ones are deleted
+PROFILING_KEEP = 1000
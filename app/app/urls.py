@@ -22,6 +22,12 @@ from django.contrib import admin
 # to include urls from a different apps
 from django.urls import path, include
 
+from core.views import (
+    DatabasePoolStatsView,
+    RequestMetricsView,
+    prometheus_metrics,
+)
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     # Adds a URL to our project that uses spectacular view API.
@@ -35,4 +41,10 @@ urlpatterns = [
          ),
     path('api/user/', include('user.urls')),
     path('api/recipe/', include('recipe.urls')),
+    # Connection pool usage of the process serving the request
+    path('api/db-pool/', DatabasePoolStatsView.as_view(), name='db-pool'),
+    # Queries and latency histograms per endpoint, for this process
+    path('api/metrics/', RequestMetricsView.as_view(), name='metrics'),
+    # Prometheus scrape target, at the path it requests by default
+    path('metrics', prometheus_metrics, name='prometheus-metrics'),
 ]
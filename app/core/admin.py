@@ -3,6 +3,7 @@ Django admin customization.
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.utils.html import format_html, format_html_join
 # Integrates with the django translation system. (Will not implement
 # translation for this project). But it's a best practice to have it.
 from django.utils.translation import gettext_lazy as _
@@ -64,4 +65,81 @@ class UserAdmin(BaseUserAdmin):
 # the default userAdmin.
 # We want to use the UserAdmin we created above.
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Recipe)
\ No newline at end of file
+admin.site.register(models.Recipe)
+
+
+# Profiles captured by core.profiling, newest first. They are only
+# read here, never added or edited.
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Define the admin pages for request profiles."""
+    list_display = [
+        'created_at',
+        'method',
+        'endpoint',
+        'status_code',
+        'duration_ms',
+        'query_count',
+        'db_ms',
+        'trigger',
+    ]
+    list_filter = ['trigger', 'endpoint', 'method']
+    search_fields = ['path']
+    date_hierarchy = 'created_at'
+    fields = [
+        'created_at',
+        'trigger',
+        ('method', 'path'),
+        ('endpoint', 'status_code'),
+        'user',
+        ('duration_ms', 'query_count', 'db_ms'),
+        'hot_functions_table',
+        'sql_timeline_table',
+    ]
+    readonly_fields = [
+        name
+        for field in fields
+        for name in (field if isinstance(field, tuple) else (field,))
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description=_('Hot functions'))
+    def hot_functions_table(self, obj):
+        return self.table(
+            [_('Own ms'), _('Cumulative ms'), _('Calls'), _('Function')],
+            (
+                (f'{row["own_ms"]:.2f}', f'{row["cumulative_ms"]:.2f}',
+                 row['calls'], row['function'])
+                for row in obj.hot_functions
+            ),
+        )
+
+    @admin.display(description=_('SQL timeline'))
+    def sql_timeline_table(self, obj):
+        return self.table(
+            [_('Start ms'), _('Duration ms'), _('SQL')],
+            (
+                (f'{row["start_ms"]:.2f}', f'{row["duration_ms"]:.2f}',
+                 row['sql'])
+                for row in obj.sql_timeline
+            ),
+        )
+
+    def table(self, headers, rows):
+        """Return an HTML table of the rows, values escaped."""
+        return format_html(
+            '<table><thead><tr>{}</tr></thead><tbody>{}</tbody></table>',
+            format_html_join('', '<th>{}</th>', ((h,) for h in headers)),
+            format_html_join('', '<tr>{}</tr>', (
+                (format_html_join('', '<td>{}</td>',
+                                  ((value,) for value in row)),)
+                for row in rows
+            )),
+        )
+
+
+admin.site.register(models.RequestProfile, RequestProfileAdmin)
@@ -0,0 +1,80 @@
+"""
+Async API views.
+
+Under ASGI, Django 3.2 runs a sync view with
+sync_to_async(thread_sensitive=True): every sync view of a process runs
+in the same thread, one request at a time, however many requests the
+event loop has accepted. A request waiting on the database holds up all
+the others.
+
+AsyncViewMixin turns a DRF view into a coroutine. Django 3.2 has no
+async ORM, so the view hands the request's database work to a worker
+thread of the loop's executor, and requests wait on the database side
+by side. It does so in a single trip per request: authentication,
+permissions, the handler and finalize_response() all query the
+database or the cache, and every trip costs a thread switch and a
+connection from the pool. The connection the worker thread used is
+given back to the pool before the coroutine resumes, nothing ties a
+request to a worker thread.
+
+Under WSGI, and in tests (the test client is WSGI), Django runs the
+coroutine with async_to_sync: the work then goes back to the thread of
+the request, and its connection, as a sync view would. So does a
+request in single_thread(), e.g. one being profiled.
+"""
+import contextlib
+import contextvars
+import functools
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+
+# Set while the views must run in the thread of the request
+_single_thread = contextvars.ContextVar('single_thread', default=False)
+
+
+@contextlib.contextmanager
+def single_thread():
+    """Run the async views of the block in the request's own thread."""
+    token = _single_thread.set(True)
+    try:
+        yield
+    finally:
+        _single_thread.reset(token)
+
+
+def closing_connections(func):
+    """Wrap func to give the thread's connections back after a call."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Like request_started and request_finished do for a request.
+        # With CONN_MAX_AGE = 0 the connection goes back to the pool.
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return wrapper
+
+
+def run_sync(request, func, *args, **kwargs):
+    """Return an awaitable running func off the event loop."""
+    if not isinstance(request, ASGIRequest) or _single_thread.get():
+        return sync_to_async(func, thread_sensitive=True)(*args, **kwargs)
+    return sync_to_async(closing_connections(func),
+                         thread_sensitive=False)(*args, **kwargs)
+
+
+class AsyncViewMixin:
+    """Serve a DRF view from a coroutine, see the module docstring."""
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        # The view returned calls dispatch(), a coroutine: Django only
+        # awaits it if the view is marked as one.
+        return markcoroutinefunction(super().as_view(*args, **kwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        return await run_sync(request, super().dispatch, request, *args,
+                              **kwargs)
@@ -0,0 +1,133 @@
+"""
+PostgreSQL backend taking its connections from a pool.
+
+Set DATABASES[alias]['POOL'] to configure it, {'SIZE': 0} to connect
+and close like the stock backend.
+"""
+import functools
+
+import psycopg2
+import psycopg2.extras
+from psycopg2 import extensions
+
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+
+from core.db import pool
+from core.db.backends.postgresql.creation import DatabaseCreation
+
+
+def connect(conn_params, isolation_level):
+    """Open a raw connection set up like the stock backend does."""
+    connection = psycopg2.connect(**conn_params)
+    if (
+        isolation_level is not None
+        and isolation_level != connection.isolation_level
+    ):
+        connection.set_session(isolation_level=isolation_level)
+    psycopg2.extras.register_default_jsonb(conn_or_curs=connection,
+                                           loads=lambda x: x)
+    return connection
+
+
+def is_usable(connection):
+    """Return whether a raw connection answers a query."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            connection.rollback()
+    except psycopg2.Error:
+        return False
+    return True
+
+
+def reset(connection):
+    """
+    Roll back any transaction left open and reset the session, so the
+    next user gets a clean one. Return False if the connection is broken.
+    """
+    if connection.closed:
+        return False
+    status = connection.get_transaction_status()
+    if status in (
+        extensions.TRANSACTION_STATUS_INTRANS,
+        extensions.TRANSACTION_STATUS_INERROR,
+    ):
+        try:
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+    elif status != extensions.TRANSACTION_STATUS_IDLE:
+        # A query still running, or the server went away
+        return False
+    autocommit = connection.autocommit
+    try:
+        # SET parameters, WITH HOLD cursors, temporary tables, advisory
+        # locks, LISTEN... would otherwise leak to the next request.
+        # It can't run in a transaction block.
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute('DISCARD ALL')
+        connection.autocommit = autocommit
+    except psycopg2.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL database wrapper with pooled connections."""
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params):
+        """Return the pool for these settings, None when disabled."""
+        options = self.settings_dict.get('POOL', {})
+        # Connections made to create or drop the test database aren't
+        # worth keeping around.
+        if self.alias == NO_DB_ALIAS or not options.get('SIZE', 10):
+            return None
+        isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level',
+        )
+        key = (
+            self.alias,
+            conn_params['database'],
+            repr(sorted(conn_params.items())),
+            isolation_level,
+        )
+        return pool.get_pool(key, lambda: pool.ConnectionPool(
+            functools.partial(connect, conn_params, isolation_level),
+            is_usable=is_usable,
+            reset=reset,
+            size=options.get('SIZE', 10),
+            max_overflow=options.get('MAX_OVERFLOW', 10),
+            timeout=options.get('TIMEOUT', 30),
+            health_check_after=options.get('HEALTH_CHECK_AFTER', 10),
+            idle_timeout=options.get('IDLE_TIMEOUT', 300),
+            max_lifetime=options.get('MAX_LIFETIME', 3600),
+        ))
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        self._pool = self.get_pool(conn_params)
+        if self._pool is None:
+            return super().get_new_connection(conn_params)
+        connection = self._pool.checkout()
+        # The connection already has the isolation level of OPTIONS,
+        # the pool is keyed on it.
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level,
+        )
+        return connection
+
+    def _close(self):
+        pool = getattr(self, '_pool', None)
+        if self.connection is None or pool is None:
+            return super()._close()
+        if self.in_atomic_block:
+            # Closed mid-transaction: Django keeps the connection
+            # around to raise on its next use, it can't be reused.
+            pool.discard(self.connection)
+        else:
+            pool.checkin(self.connection)
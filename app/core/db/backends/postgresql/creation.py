@@ -0,0 +1,19 @@
+from django.db.backends.postgresql import creation
+
+from core.db import pool
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Close pooled connections before a test database is used as a
+    template or dropped, PostgreSQL refuses both while it's in use."""
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        self._close_pooled(self.connection.settings_dict['NAME'])
+        super()._clone_test_db(suffix, verbosity, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        self._close_pooled(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+    def _close_pooled(self, database_name):
+        pool.close_pools(lambda key: key[1] == database_name)
@@ -0,0 +1,255 @@
+"""
+Process-wide pool of database connections.
+
+Used by the core.db.backends.postgresql backend: Django "closes" its
+connection at the end of each request, which hands it back here
+instead, and the next request reuses it without a new TCP and auth
+handshake.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+
+class PoolTimeout(OperationalError):
+    """Raised when no connection frees up within the pool timeout."""
+
+
+class PooledConnection:
+    """A raw connection with the times the pool needs."""
+    __slots__ = ('connection', 'created_at', 'returned_at')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = self.returned_at = time.monotonic()
+
+
+class ConnectionPool:
+    """Bounded pool of DB-API connections."""
+    # Up to `size` connections are kept open between uses. Under load,
+    # up to `max_overflow` more are opened, and closed as soon as they
+    # are returned. Past that, callers wait up to `timeout` seconds.
+
+    def __init__(self, connect, *, is_usable, reset, size=10,
+                 max_overflow=10, timeout=30, health_check_after=10,
+                 idle_timeout=300, max_lifetime=3600):
+        # connect() opens a raw connection, is_usable(conn) checks one
+        # with a round trip, and reset(conn) rolls back what's left of
+        # a transaction and resets the session, returning False if the
+        # connection is broken.
+        self.connect = connect
+        self.is_usable = is_usable
+        self.reset = reset
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+
+        self._condition = threading.Condition()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._idle = deque()
+        self._checked_out = {}
+        self._counts = dict.fromkeys((
+            'connects', 'reuses', 'waits', 'timeouts',
+            'health_check_failures', 'recycled', 'discarded',
+        ), 0)
+        self._peak_in_use = 0
+
+    def _check_fork(self):
+        # A forked worker (e.g. gunicorn --preload) shares the sockets
+        # of its parent's connections: forget them without closing, as
+        # closing would also end them for the parent.
+        if self._pid != os.getpid():
+            self._reset_state()
+
+    @property
+    def max_connections(self):
+        return self.size + self.max_overflow
+
+    def checkout(self):
+        """Return a raw connection, reused when possible."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            pooled, key, stale = self._reserve(deadline)
+            # Round trips and closes happen outside the lock, so a slow
+            # or dead connection doesn't hold up every other thread.
+            for old in stale:
+                self._close(old)
+            if pooled is None:
+                break
+            if (
+                time.monotonic() - pooled.returned_at
+                <= self.health_check_after
+                or self.is_usable(pooled.connection)
+            ):
+                with self._condition:
+                    self._counts['reuses'] += 1
+                return pooled.connection
+            with self._condition:
+                del self._checked_out[id(pooled.connection)]
+                self._counts['health_check_failures'] += 1
+                self._condition.notify()
+            self._close(pooled)
+
+        try:
+            pooled = PooledConnection(self.connect())
+        except Exception:
+            with self._condition:
+                del self._checked_out[key]
+                self._condition.notify()
+            raise
+        with self._condition:
+            del self._checked_out[key]
+            self._checked_out[id(pooled.connection)] = pooled
+            self._counts['connects'] += 1
+        return pooled.connection
+
+    def _reserve(self, deadline):
+        """
+        Reserve an idle connection, or a slot to open one, waiting
+        until the deadline. Return (idle connection or None, slot key,
+        stale connections to close).
+        """
+        stale = []
+        pooled = key = None
+        with self._condition:
+            self._check_fork()
+            while True:
+                pooled = self._take_idle(stale)
+                if pooled is not None:
+                    self._checked_out[id(pooled.connection)] = pooled
+                    break
+                if len(self._checked_out) < self.max_connections:
+                    # The connection is opened unlocked
+                    key = object()
+                    self._checked_out[key] = None
+                    break
+                remaining = deadline - time.monotonic()
+                self._counts['waits'] += 1
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    self._counts['timeouts'] += 1
+                    break
+            self._peak_in_use = max(self._peak_in_use,
+                                    len(self._checked_out))
+        if pooled is None and key is None:
+            for old in stale:
+                self._close(old)
+            raise PoolTimeout(
+                f'No database connection available after '
+                f'{self.timeout}s ({self.max_connections} in use).'
+            )
+        return pooled, key, stale
+
+    def _take_idle(self, stale):
+        """Pop the most recent idle connection, moving expired to stale."""
+        now = time.monotonic()
+        while self._idle:
+            pooled = self._idle.pop()
+            if (
+                now - pooled.created_at > self.max_lifetime
+                or now - pooled.returned_at > self.idle_timeout
+            ):
+                self._counts['recycled'] += 1
+                stale.append(pooled)
+                continue
+            return pooled
+        return None
+
+    def checkin(self, connection):
+        """Give a connection back to the pool."""
+        if self._pid != os.getpid():
+            # Checked out before a fork, it belongs to the parent
+            return
+        # Outside the lock, a reset is a round trip or two
+        usable = self.reset(connection)
+        with self._condition:
+            pooled = self._checked_out.pop(id(connection), None)
+            self._condition.notify()
+            if pooled is None:
+                # Already discarded
+                return
+            now = time.monotonic()
+            if now - pooled.created_at > self.max_lifetime:
+                self._counts['recycled'] += 1
+            elif not usable or len(self._idle) >= self.size:
+                self._counts['discarded'] += 1
+            else:
+                pooled.returned_at = now
+                self._idle.append(pooled)
+                return
+            self._close(pooled)
+
+    def discard(self, connection):
+        """Close a checked out connection instead of reusing it."""
+        with self._condition:
+            pooled = self._checked_out.pop(id(connection), None)
+            self._condition.notify()
+            if pooled is not None:
+                self._counts['discarded'] += 1
+                self._close(pooled)
+
+    def close_idle(self):
+        """Close every idle connection."""
+        with self._condition:
+            while self._idle:
+                self._close(self._idle.pop())
+
+    def _close(self, pooled):
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        """Return a dict of the pool's settings, usage and counters."""
+        with self._condition:
+            self._check_fork()
+            in_use = len(self._checked_out)
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'in_use': in_use,
+                'idle': len(self._idle),
+                'peak_in_use': self._peak_in_use,
+                'utilization': in_use / self.max_connections,
+                **self._counts,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, factory):
+    """Return the pool for key, creating it with factory() if needed."""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = factory()
+        return pool
+
+
+def close_pools(match=lambda key: True):
+    """Close the idle connections of the pools whose key matches."""
+    with _pools_lock:
+        pools = [pool for key, pool in _pools.items() if match(key)]
+    for pool in pools:
+        pool.close_idle()
+
+
+def get_pool_stats():
+    """Return the stats of every pool, by alias and database."""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return [
+        {'alias': key[0], 'database': key[1], **pool.stats()}
+        for key, pool in pools
+    ]
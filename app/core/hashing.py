@@ -0,0 +1,75 @@
+"""
+Password hasher profile.
+
+PBKDF2 takes tens of milliseconds of CPU per password. It runs in
+hashlib.pbkdf2_hmac, which releases the GIL, so the other threads of a
+worker keep running while a password is hashed; there's no need to move
+hashing to another process. The cost is CPU time, tuned here with
+PASSWORD_PBKDF2_ITERATIONS (see `python manage.py benchmark_hashers`).
+
+That CPU time is also why the signup and login views bound how many
+passwords a process hashes at once (hashing_slot()): past
+PASSWORD_HASHING_CONCURRENCY, a burst of logins would only queue up
+behind the CPUs, slowing every other request of the worker. A caller
+that gets no slot within PASSWORD_HASHING_TIMEOUT seconds gets a 429
+with Retry-After instead.
+"""
+import contextlib
+import threading
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import Throttled
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 with the iteration count of PASSWORD_PBKDF2_ITERATIONS."""
+    # Same algorithm name as Django's, so existing hashes still verify,
+    # and are upgraded on login when the iteration count changes.
+
+    def __init__(self):
+        self.iterations = settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class HashingBusy(Throttled):
+    """Raised when too many passwords are being hashed at once."""
+    default_detail = _('Too many password checks in progress, '
+                       'try again shortly.')
+
+
+_lock = threading.Lock()
+_slots = None
+
+
+def _get_slots():
+    global _slots
+    with _lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(
+                settings.PASSWORD_HASHING_CONCURRENCY,
+            )
+        return _slots
+
+
+def reset_slots():
+    """Drop the semaphore, it is created again on next use."""
+    global _slots
+    with _lock:
+        _slots = None
+
+
+@contextlib.contextmanager
+def hashing_slot():
+    """Hold one of the process's hashing slots for the block.
+
+    Raise HashingBusy if none frees up within PASSWORD_HASHING_TIMEOUT
+    seconds.
+    """
+    slots = _get_slots()
+    if not slots.acquire(timeout=settings.PASSWORD_HASHING_TIMEOUT):
+        raise HashingBusy(wait=settings.PASSWORD_HASHING_RETRY_AFTER)
+    try:
+        yield
+    finally:
+        slots.release()
@@ -0,0 +1,95 @@
+"""
+Django command to time password hashing with different work factors.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.hashing import PBKDF2PasswordHasher
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the password hasher profile."""
+    help = 'Time PBKDF2 hashing for several iteration counts, and how ' \
+           'much CPU another thread of the process keeps meanwhile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            default='100000,260000,390000',
+            help='Comma separated PBKDF2 iteration counts. '
+                 'Default: 100000,260000,390000.',
+        )
+        parser.add_argument(
+            '--hashes',
+            type=int,
+            default=8,
+            help='Passwords hashed per measure. Default: 8.',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Threads hashing at once. Default: 4.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        if options['hashes'] < 1 or options['threads'] < 1:
+            raise CommandError('--hashes and --threads must be at least 1.')
+        try:
+            iterations = [
+                int(value) for value in options['iterations'].split(',')
+            ]
+        except ValueError:
+            raise CommandError('--iterations must be integers.')
+
+        baseline = self.spin_rate(0.2)
+        for count in iterations:
+            hasher = PBKDF2PasswordHasher()
+            hasher.iterations = count
+
+            serial = self.time_hashes(hasher, options['hashes'], 1)
+            threaded = self.time_hashes(hasher, options['hashes'],
+                                        options['threads'])
+            # A thread busy with Python code while one hashes: with the
+            # GIL held it would barely run.
+            hashing = threading.Thread(
+                target=self.time_hashes,
+                args=(hasher, options['hashes'], 1),
+            )
+            hashing.start()
+            spin = self.spin_rate(serial / 2)
+            hashing.join()
+
+            self.stdout.write(
+                f'{count:>8} iterations: '
+                f'{serial * 1000 / options["hashes"]:6.1f} ms per hash, '
+                f'{options["hashes"] / threaded:6.1f} hashes/s from '
+                f'{options["threads"]} threads '
+                f'({options["hashes"] / serial:6.1f} from 1), '
+                f'other thread kept {spin * 100 / baseline:3.0f}% '
+                f'of its speed'
+            )
+
+    def time_hashes(self, hasher, count, threads):
+        """Hash `count` passwords from `threads` threads, return seconds."""
+        salt = hasher.salt()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(
+                lambda n: hasher.encode(f'password-{n}', salt),
+                range(count),
+            ))
+        return time.perf_counter() - started
+
+    def spin_rate(self, seconds):
+        """Return how many loops of Python code run per second."""
+        loops = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            loops += 1
+        return loops / (time.perf_counter() - started)
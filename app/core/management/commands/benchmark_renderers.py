@@ -0,0 +1,98 @@
+"""
+Django command to compare the speed of the API renderers and parsers.
+"""
+import io
+import timeit
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Recipe
+from core.parsers import MessagePackParser, ORJSONParser
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+from recipe.serializers import RecipeSerializer
+
+# (name, renderer, parser) pairs. The first one is the baseline the
+# others are compared with.
+FORMATS = [
+    ('json', JSONRenderer(), JSONParser()),
+    ('orjson', ORJSONRenderer(), ORJSONParser()),
+    ('msgpack', MessagePackRenderer(), MessagePackParser()),
+]
+
+
+def make_page(count):
+    """Return a recipe list response body with `count` recipes."""
+    now = timezone.now()
+    recipes = [
+        Recipe(
+            id=n,
+            title=f'Recipe number {n}',
+            time_minutes=n % 120,
+            price=Decimal(n % 10000) / 100,
+            link=f'https://example.com/recipes/{n}.pdf',
+            updated_at=now,
+        )
+        for n in range(1, count + 1)
+    ]
+    return {
+        'next': 'https://example.com/api/recipe/recipes/?cursor=cD0xMDA%3D',
+        'previous': None,
+        'results': RecipeSerializer(recipes, many=True).data,
+    }
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the renderers and parsers."""
+    help = 'Compare render/parse times and sizes of the API formats on a ' \
+           'large recipe list.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes',
+            type=int,
+            default=10000,
+            help='Recipes in the rendered list. Default: 10000.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timing runs per format, the best one is kept. '
+                 'Default: 5.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        data = make_page(options['recipes'])
+        repeat = options['repeat']
+        self.stdout.write(
+            f'{options["recipes"]} recipes, best of {repeat} runs'
+        )
+
+        baseline = None
+        for name, renderer, parser in FORMATS:
+            body = renderer.render(data, renderer.media_type)
+            render_time = min(timeit.repeat(
+                lambda: renderer.render(data, renderer.media_type),
+                number=1,
+                repeat=repeat,
+            ))
+            parse_time = min(timeit.repeat(
+                lambda: parser.parse(io.BytesIO(body), parser.media_type),
+                number=1,
+                repeat=repeat,
+            ))
+            if baseline is None:
+                baseline = (render_time, parse_time)
+
+            self.stdout.write(
+                f'{name:>8}: render {render_time * 1000:8.1f} ms '
+                f'(x{baseline[0] / render_time:.1f}), '
+                f'parse {parse_time * 1000:8.1f} ms '
+                f'(x{baseline[1] / parse_time:.1f}), '
+                f'{len(body) / 1024:.0f} KiB'
+            )
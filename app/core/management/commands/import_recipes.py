@@ -0,0 +1,169 @@
+"""
+Django command to import recipes from a large NDJSON or CSV file.
+"""
+import csv
+import itertools
+import json
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from core.models import ImportCheckpoint, Recipe
+from recipe.serializers import RecipeSerializer
+
+
+def read_ndjson(file):
+    """Yield one dict per non blank line of an NDJSON file."""
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # Passed on as is, validation reports it as invalid
+            yield line
+
+
+def read_csv(file):
+    """Yield one dict per row of a CSV file with a header."""
+    yield from csv.DictReader(file)
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+def get_checkpoint(path, user):
+    """Return the ImportCheckpoint of a file for a user."""
+    stat = os.stat(path)
+    checkpoint, _created = ImportCheckpoint.objects.get_or_create(
+        user=user,
+        path=os.path.realpath(path),
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+    )
+    return checkpoint
+
+
+class Command(BaseCommand):
+    """Django command to import recipes for a user."""
+    help = 'Import recipes for a user from an NDJSON or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON or CSV file to import.')
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Email of the user the recipes belong to.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=READERS,
+            help='File format. Default: guessed from the file extension.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Recipes inserted per query. Default: 1000.',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Record progress in the database, and skip the rows an '
+                 'earlier run imported from the same file (path, size '
+                 'and modification time) for the same user, so an '
+                 'interrupted import can be run again.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        path = options['path']
+        file_format = options['format'] or \
+            os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(
+                'Unknown file format, use --format ndjson or --format csv.'
+            )
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        if not os.path.isfile(path):
+            raise CommandError(f'File {path} does not exist.')
+
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["user"]} does not exist.')
+
+        checkpoint = get_checkpoint(path, user) if options['resume'] \
+            else None
+        done = checkpoint.rows if checkpoint else 0
+        if done:
+            self.stdout.write(f'Resuming after row {done}.')
+
+        # One serializer validates every row, so its fields are only
+        # built once instead of once per row.
+        serializer = RecipeSerializer()
+        batch_size = options['batch_size']
+        batch = []
+        imported = skipped = 0
+        started = time.monotonic()
+        row_number = done
+
+        with open(path, newline='', encoding='utf-8') as file:
+            rows = itertools.islice(READERS[file_format](file), done, None)
+            for row_number, row in enumerate(rows, start=done + 1):
+                try:
+                    attrs = serializer.run_validation(row)
+                except ValidationError as error:
+                    skipped += 1
+                    self.stderr.write(f'Row {row_number}: {error.detail}')
+                else:
+                    batch.append(Recipe(user=user, **attrs))
+
+                if len(batch) >= batch_size:
+                    imported += self.save_batch(batch, checkpoint,
+                                                row_number)
+                    batch = []
+                    self.report(imported, started)
+
+            # Trailing invalid rows still count as done
+            imported += self.save_batch(batch, checkpoint, row_number)
+
+        self.report(imported, started)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} recipes, skipped {skipped} invalid rows.'
+        ))
+
+    def save_batch(self, batch, checkpoint, row_number):
+        """Insert a batch of recipes and move the checkpoint past it."""
+        # In one transaction: a crash can't leave the batch imported
+        # but not recorded, which would import it again on resume.
+        with transaction.atomic():
+            Recipe.objects.bulk_create(batch)
+            if checkpoint is not None and checkpoint.rows != row_number:
+                # Only moves from where this run found it, so two runs
+                # of the same import can't both insert a batch.
+                moved = ImportCheckpoint.objects.filter(
+                    pk=checkpoint.pk,
+                    rows=checkpoint.rows,
+                ).update(rows=row_number, updated_at=timezone.now())
+                if not moved:
+                    raise CommandError(
+                        'Another run of this import moved the checkpoint.'
+                    )
+                checkpoint.rows = row_number
+        return len(batch)
+
+    def report(self, imported, started):
+        """Write the progress so far."""
+        elapsed = time.monotonic() - started
+        rate = imported / elapsed if elapsed else 0
+        self.stdout.write(f'{imported} recipes imported ({rate:.0f} rows/s)')
@@ -0,0 +1,175 @@
+"""
+Django command to load test a running API server.
+"""
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Connection:
+    """Keep-alive HTTP/1.1 connection sending GET requests."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def get(self, target, headers):
+        """Send a GET and return the response status."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port,
+            )
+        lines = [f'GET {target} HTTP/1.1', f'Host: {self.host}:{self.port}']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Connection closed by the server.')
+        status = int(status_line.split()[1])
+
+        length, chunked, close = 0, False, False
+        while True:
+            line = (await self.reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'transfer-encoding':
+                chunked = 'chunked' in value
+            elif name == 'connection':
+                close = value == 'close'
+
+        if chunked:
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+        else:
+            await self.reader.readexactly(length)
+
+        if close:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def run(url, headers, concurrency, total):
+    """Send `total` GETs over `concurrency` connections.
+
+    Return (elapsed seconds, latencies in seconds, statuses).
+    """
+    parts = urlsplit(url)
+    if parts.scheme != 'http':
+        raise CommandError('Only http:// URLs are supported.')
+    target = parts.path or '/'
+    if parts.query:
+        target += f'?{parts.query}'
+
+    latencies, statuses = [], []
+    remaining = iter(range(total))
+
+    async def worker():
+        connection = Connection(parts.hostname, parts.port or 80)
+        try:
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    status = await connection.get(target, headers)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    connection.close()
+                    status = 0
+                latencies.append(time.perf_counter() - started)
+                statuses.append(status)
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies, statuses
+
+
+class Command(BaseCommand):
+    """Django command to measure throughput and latency of a URL."""
+    help = 'Send concurrent GET requests to a running server (e.g. ' \
+           '`uvicorn app.asgi:application`) and report throughput and ' \
+           'latency at each concurrency level.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='http:// URL to request.')
+        parser.add_argument(
+            '--token',
+            help='API token, sent as "Authorization: Token <token>".',
+        )
+        parser.add_argument(
+            '--header',
+            action='append',
+            default=[],
+            help='Extra "Name: value" header. Can be repeated.',
+        )
+        parser.add_argument(
+            '--concurrency',
+            default='1,8,32',
+            help='Comma separated numbers of concurrent connections. '
+                 'Default: 1,8,32.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Requests sent per concurrency level. Default: 500.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        headers = {}
+        for header in options['header']:
+            name, _, value = header.partition(':')
+            headers[name.strip()] = value.strip()
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1.')
+        try:
+            levels = [int(value) for value in
+                      options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrency must be integers.')
+        if min(levels) < 1:
+            raise CommandError('--concurrency must be at least 1.')
+
+        for concurrency in levels:
+            elapsed, latencies, statuses = asyncio.run(run(
+                options['url'],
+                headers,
+                concurrency,
+                options['requests'],
+            ))
+            latencies.sort()
+            errors = sum(not 200 <= status < 400 for status in statuses)
+            self.stdout.write(
+                f'concurrency {concurrency:>4}: '
+                f'{len(latencies) / elapsed:8.1f} req/s, '
+                f'p50 {statistics.median(latencies) * 1000:7.1f} ms, '
+                f'p95 {percentile(latencies, 95) * 1000:7.1f} ms, '
+                f'p99 {percentile(latencies, 99) * 1000:7.1f} ms, '
+                f'{errors} errors'
+            )
+
+
+def percentile(sorted_values, percent):
+    """Return the given percentile of sorted values."""
+    index = round(percent / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
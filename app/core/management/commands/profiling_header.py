@@ -0,0 +1,17 @@
+"""
+Django command to print a header that gets a request profiled.
+"""
+from django.core.management.base import BaseCommand
+
+from core.profiling import make_header_value
+
+
+class Command(BaseCommand):
+    """Django command to make a signed X-Profile header."""
+    help = 'Print an X-Profile header. Requests sending it are ' \
+           'profiled and show up under Request profiles in the admin. ' \
+           'Valid for PROFILING_SIGNATURE_MAX_AGE seconds.'
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        self.stdout.write(f'X-Profile: {make_header_value()}')
@@ -1,28 +1,134 @@
 """
 Django command to wait for the database to be available.
 """
+import random
 import time
+from math import ceil
+from concurrent.futures import ThreadPoolExecutor
+
 from psycopg2 import OperationalError as Psycopg2Error
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 # Error django throws when the database is not ready
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
 
 
 class Command(BaseCommand):
     """Django command to wait for the database."""
+    help = 'Wait until the databases answer a query, retrying with ' \
+           'exponential backoff up to a deadline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            action='append',
+            dest='databases',
+            help='Database alias to wait for, can be repeated. '
+                 'Default: default.',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60,
+            help='Seconds to wait before failing. Default: 60.',
+        )
+        parser.add_argument(
+            '--initial-delay',
+            type=float,
+            default=0.01,
+            help='Seconds before the first retry, doubled after each '
+                 'failed attempt. Default: 0.01.',
+        )
+        parser.add_argument(
+            '--max-delay',
+            type=float,
+            default=1,
+            help='Longest wait between two attempts. Default: 1.',
+        )
 
     def handle(self, *args, **options):
         """Entry point for command."""
         # writes message to the screen
         self.stdout.write("Waiting for database...")
-        db_up = False  # assume db is not up
-        while db_up is False:
-            try:
-                # if database isn't ready, we will throw an exception
-                self.check(databases=['default'])
-                db_up = True  # Once db is ready, we stop the database
-            except (Psycopg2Error, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)  # stop for 1 second before we try again
+        aliases = options['databases'] or ['default']
+        for alias in aliases:
+            if alias not in connections.databases:
+                raise CommandError(f'Unknown database "{alias}".')
+        deadline = time.monotonic() + options['timeout']
+
+        # Every database is waited for in its own thread, so the total
+        # wait is the one of the slowest, not the sum.
+        with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+            futures = [
+                executor.submit(
+                    self.wait_for,
+                    alias,
+                    deadline,
+                    options['initial_delay'],
+                    options['max_delay'],
+                )
+                for alias in aliases
+            ]
+            results = [future.result() for future in futures]
 
+        for alias, (elapsed, attempts) in zip(aliases, results):
+            self.stdout.write(
+                f'Database "{alias}" ready after {elapsed * 1000:.0f} ms '
+                f'({attempts} attempt{"s" if attempts > 1 else ""}).'
+            )
         self.stdout.write(self.style.SUCCESS('Database available!'))
+
+    def wait_for(self, alias, deadline, initial_delay, max_delay):
+        """Probe a database until it answers.
+
+        Return (seconds waited, attempts), raise CommandError when the
+        deadline passes first.
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                self.probe(alias, deadline - time.monotonic())
+            except (Psycopg2Error, OperationalError) as error:
+                # Full jitter: containers started together don't retry
+                # in lockstep.
+                delay = random.uniform(
+                    0,
+                    min(max_delay, initial_delay * 2 ** (attempt - 1)),
+                )
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f'Database "{alias}" unavailable after '
+                        f'{attempt} attempts: {error}'
+                    )
+                self.stdout.write(
+                    f'Database "{alias}" unavailable, waiting '
+                    f'{delay * 1000:.0f} ms...'
+                )
+                time.sleep(min(delay, remaining))
+            else:
+                return time.monotonic() - started, attempt
+
+    def probe(self, alias, timeout):
+        """Run a SELECT 1 on a database, raise if it can't."""
+        # Much cheaper than the system checks: one round trip once
+        # connected.
+        connection = connections[alias]
+        # A connection of its own: a host that drops packets would
+        # otherwise hang the connect past the deadline, and the pool
+        # has no use for a probe's connection.
+        connection = type(connection)({
+            **connection.settings_dict,
+            'OPTIONS': {
+                **connection.settings_dict['OPTIONS'],
+                'connect_timeout': max(1, ceil(timeout)),
+            },
+            'POOL': {'SIZE': 0},
+        }, alias)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        finally:
+            connection.close()
@@ -0,0 +1,223 @@
+"""
+In-process request metrics, per URL name.
+
+RequestMetricsMiddleware measures every request: SQL queries and their
+time, serialization time (objects to response data, see
+SerializationTimingMixin), render time (response data to bytes) and
+total latency. They are added to histograms kept per URL name, e.g.
+`recipe:recipe-list`, and can be read at /api/metrics/.
+
+QUERY_BUDGETS gives the most queries a request of an endpoint should
+make. Requests going over are counted, and tests assert the budgets
+with core.testing.QueryBudgetMixin.
+"""
+import bisect
+import contextlib
+import contextvars
+import math
+import threading
+import time
+
+from django.conf import settings
+
+# Upper bounds of the histogram buckets
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500,
+                      5000, math.inf)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, math.inf)
+
+
+class Histogram:
+    """Counts of values falling in fixed buckets."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Return the upper bound of the bucket holding quantile q."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank and seen:
+                return bound
+        return None
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            # JSON has no infinity, the last bound is written "+Inf"
+            'buckets': {
+                ('+Inf' if bound == math.inf else str(bound)): count
+                for bound, count in zip(self.buckets, self.counts)
+            },
+        }
+
+
+class RequestMetrics:
+    """What one request cost."""
+    __slots__ = ('endpoint', 'started', 'queries', 'db_time',
+                 'serialization_time', 'render_time', 'total_time')
+
+    def __init__(self):
+        self.endpoint = None
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialization_time = 0.0
+        self.render_time = 0.0
+        self.total_time = 0.0
+
+    @property
+    def query_budget(self):
+        return get_query_budget(self.endpoint)
+
+    @property
+    def over_budget(self):
+        budget = self.query_budget
+        return budget is not None and self.queries > budget
+
+
+class EndpointMetrics:
+    """Histograms of the requests of one endpoint."""
+
+    def __init__(self):
+        self.over_budget = 0
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.serialization_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.render_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.total_ms = Histogram(LATENCY_BUCKETS_MS)
+
+    def observe(self, metrics):
+        self.queries.observe(metrics.queries)
+        self.db_ms.observe(metrics.db_time * 1000)
+        self.serialization_ms.observe(metrics.serialization_time * 1000)
+        self.render_ms.observe(metrics.render_time * 1000)
+        self.total_ms.observe(metrics.total_time * 1000)
+        if metrics.over_budget:
+            self.over_budget += 1
+
+    def as_dict(self):
+        return {
+            'requests': self.total_ms.count,
+            'over_budget': self.over_budget,
+            'queries': self.queries.as_dict(),
+            'db_ms': self.db_ms.as_dict(),
+            'serialization_ms': self.serialization_ms.as_dict(),
+            'render_ms': self.render_ms.as_dict(),
+            'total_ms': self.total_ms.as_dict(),
+        }
+
+
+_lock = threading.Lock()
+_endpoints = {}
+# Metrics of the request being handled
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+def get_query_budget(endpoint):
+    """Return the query budget of a URL name, None if it has none."""
+    return settings.QUERY_BUDGETS.get(endpoint)
+
+
+def start_request():
+    """Start measuring a request, return (metrics, token for finish)."""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def current():
+    """Return the metrics of the request being handled, if any."""
+    return _current.get()
+
+
+def finish_request(metrics, token, endpoint):
+    """Stop measuring a request and add it to its endpoint histograms."""
+    _current.reset(token)
+    metrics.endpoint = endpoint
+    metrics.total_time = time.perf_counter() - metrics.started
+    with _lock:
+        stats = _endpoints.get(endpoint)
+        if stats is None:
+            stats = _endpoints[endpoint] = EndpointMetrics()
+        stats.observe(metrics)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting the queries of the request."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+@contextlib.contextmanager
+def not_measured():
+    """Leave the queries of the block out of the request's metrics."""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextlib.contextmanager
+def serializing():
+    """Add the time spent in the block to the request's serialization."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serialization_time += time.perf_counter() - started
+
+
+class SerializationTimingMixin:
+    """Serializer mixin timing `.data` as the request's serialization."""
+    # Views read `get_serializer(...).data` once, when the response is
+    # built; nested serializers only run to_representation and are
+    # timed with their parent. Queries of lazy relations read while
+    # serializing are counted in both db_time and serialization_time.
+
+    @property
+    def data(self):
+        with serializing():
+            return super().data
+
+
+def snapshot():
+    """Return the metrics of every endpoint as a dict."""
+    with _lock:
+        return {
+            endpoint: {
+                'query_budget': get_query_budget(endpoint),
+                **stats.as_dict(),
+            }
+            for endpoint, stats in sorted(_endpoints.items())
+        }
+
+
+def reset():
+    """Forget every recorded request."""
+    with _lock:
+        _endpoints.clear()
@@ -0,0 +1,227 @@
+"""
+Middleware for the API.
+"""
+import gzip
+import hashlib
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+
+from core import metrics, prometheus
+
+# brotli and zstandard are in requirements.txt, but an encoding whose
+# library is missing is simply never offered.
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+def compress_gzip(content):
+    return gzip.compress(
+        content,
+        compresslevel=settings.COMPRESSION_LEVELS['gzip'],
+    )
+
+
+def compress_br(content):
+    return brotli.compress(content, quality=settings.COMPRESSION_LEVELS['br'])
+
+
+def compress_zstd(content):
+    return zstandard.ZstdCompressor(
+        level=settings.COMPRESSION_LEVELS['zstd'],
+    ).compress(content)
+
+
+# Content-Encoding -> compress function, for the available libraries
+COMPRESSORS = {'gzip': compress_gzip}
+if brotli is not None:
+    COMPRESSORS['br'] = compress_br
+if zstandard is not None:
+    COMPRESSORS['zstd'] = compress_zstd
+
+
+def parse_accept_encoding(header):
+    """Return {coding: q} from an Accept-Encoding header."""
+    accepted = {}
+    for item in header.split(','):
+        coding, *params = (part.strip() for part in item.split(';'))
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+
+def choose_encoding(header):
+    """Return the preferred encoding the client accepts, or None."""
+    accepted = parse_accept_encoding(header)
+    for encoding in settings.COMPRESSION_ENCODINGS:
+        if encoding not in COMPRESSORS:
+            continue
+        q = accepted.get(encoding, accepted.get('*', 0))
+        if q > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """Compress responses with gzip, brotli or zstd."""
+    # Like django.middleware.gzip.GZipMiddleware, with more encodings
+    # and a cache of compressed bodies. A response with a strong ETag
+    # always has the same body (that is what the ETag says), so its
+    # compressed bytes are cached under (ETag, encoding) and hot
+    # responses are only compressed once.
+
+    # Works in both modes, so under ASGI it doesn't force Django to
+    # adapt (and run in a thread) the handler it wraps.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            # Tells Django the middleware is async itself
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        """Return the response, compressed when worth it."""
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or not self.is_compressible(response)
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+        )
+        if encoding is None:
+            return response
+
+        etag = response.get('ETag', '')
+        compressed = self.compress(response.content, encoding, etag)
+        # Compression didn't help, send the original
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # The compressed body is a different sequence of bytes, so the
+        # ETag can only stay as a weak one (same as GZipMiddleware).
+        if etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    def is_compressible(self, response):
+        """Return whether the response's content type is compressed."""
+        content_type = response.get('Content-Type', '').lower()
+        return content_type.startswith(settings.COMPRESSION_CONTENT_TYPES)
+
+    def compress(self, content, encoding, etag):
+        """Return the compressed content, from the cache if possible."""
+        if not etag.startswith('"'):
+            return COMPRESSORS[encoding](content)
+
+        cache = caches[settings.COMPRESSION_CACHE_ALIAS]
+        digest = hashlib.sha256(etag.encode()).hexdigest()
+        key = f'compressed:{encoding}:{len(content)}:{digest}'
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = COMPRESSORS[encoding](content)
+            cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+        return compressed
+
+
+class RequestMetricsMiddleware:
+    """Record the queries, timings and latency of each request."""
+    # Per URL name, see core.metrics, and exported to Prometheus by
+    # core.prometheus. Queries are counted by a database
+    # execute wrapper reading the metrics of the current request from a
+    # context variable, so they are seen from whatever thread the view
+    # runs in.
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            # Tells Django the middleware is async itself
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        request_metrics, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.finish_request(request_metrics, token,
+                                   self.get_endpoint(request))
+        return self.process_response(request, response, request_metrics)
+
+    async def __acall__(self, request):
+        request_metrics, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.finish_request(request_metrics, token,
+                                   self.get_endpoint(request))
+        return self.process_response(request, response, request_metrics)
+
+    def process_response(self, request, response, request_metrics):
+        """Export the request's metrics, attach them to the response."""
+        prometheus.observe_request(request_metrics, request.method,
+                                   response.status_code)
+        # Read by core.testing.QueryBudgetMixin
+        response.request_metrics = request_metrics
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (response data to bytes) once
+        # every view and middleware is done with them. Building that
+        # data is timed apart, see core.metrics.SerializationTimingMixin.
+        request_metrics = metrics.current()
+        if request_metrics is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                request_metrics.render_time += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def get_endpoint(self, request):
+        """Return the URL name the request resolved to."""
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return '<unresolved>'
+        return match.view_name
@@ -0,0 +1,87 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:24
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Keeps core_recipestats in step with core_recipe: every inserted,
+# updated or deleted recipe adds or subtracts itself from the totals
+# of its user, in the same transaction.
+CREATE_TRIGGER = """
+CREATE FUNCTION core_recipe_stats_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.user_id = NEW.user_id THEN
+        IF OLD.time_minutes = NEW.time_minutes
+                AND OLD.price = NEW.price THEN
+            RETURN NULL;
+        END IF;
+        UPDATE core_recipestats SET
+            total_time_minutes =
+                total_time_minutes + NEW.time_minutes - OLD.time_minutes,
+            total_price = total_price + NEW.price - OLD.price
+        WHERE user_id = NEW.user_id;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE core_recipestats SET
+            recipe_count = recipe_count - 1,
+            total_time_minutes = total_time_minutes - OLD.time_minutes,
+            total_price = total_price - OLD.price
+        WHERE user_id = OLD.user_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO core_recipestats
+            (user_id, recipe_count, total_time_minutes, total_price)
+        VALUES (NEW.user_id, 1, NEW.time_minutes, NEW.price)
+        ON CONFLICT (user_id) DO UPDATE SET
+            recipe_count = core_recipestats.recipe_count + 1,
+            total_time_minutes =
+                core_recipestats.total_time_minutes + NEW.time_minutes,
+            total_price = core_recipestats.total_price + NEW.price;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_recipe_stats_trigger
+AFTER INSERT OR DELETE OR UPDATE OF user_id, time_minutes, price
+ON core_recipe
+FOR EACH ROW EXECUTE FUNCTION core_recipe_stats_update();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER core_recipe_stats_trigger ON core_recipe;
+DROP FUNCTION core_recipe_stats_update();
+"""
+
+# Totals for the recipes that already exist
+BACKFILL = """
+INSERT INTO core_recipestats
+    (user_id, recipe_count, total_time_minutes, total_price)
+SELECT user_id, count(*), sum(time_minutes), sum(price)
+FROM core_recipe
+GROUP BY user_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recipe_range_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recipe_stats', serialize=False, to='core.user')),
+                ('recipe_count', models.BigIntegerField(default=0)),
+                ('total_time_minutes', models.BigIntegerField(default=0)),
+                ('total_price', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+            ],
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,126 @@
+from importlib import import_module
+
+from django.db import migrations
+
+recipe_stats = import_module('core.migrations.0008_recipe_stats')
+
+# Replaces the row trigger of 0008: a statement touching n recipes ran
+# n UPDATEs of core_recipestats. These triggers run once per statement,
+# sum the changed rows (transition tables) by user and apply one UPDATE
+# per user. Users are locked in user_id order, so concurrent statements
+# don't deadlock on each other's stats rows.
+#
+# PostgreSQL takes transition tables only on single-event triggers
+# without a column list, hence one trigger per event, and the UPDATE
+# trigger skips the users whose totals did not change.
+CREATE_TRIGGERS = """
+DROP TRIGGER core_recipe_stats_trigger ON core_recipe;
+DROP FUNCTION core_recipe_stats_update();
+
+CREATE FUNCTION core_recipe_stats_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO core_recipestats
+        (user_id, recipe_count, total_time_minutes, total_price)
+    SELECT user_id, count(*), sum(time_minutes), sum(price)
+    FROM new_recipes
+    GROUP BY user_id
+    ORDER BY user_id
+    ON CONFLICT (user_id) DO UPDATE SET
+        recipe_count =
+            core_recipestats.recipe_count + EXCLUDED.recipe_count,
+        total_time_minutes =
+            core_recipestats.total_time_minutes
+            + EXCLUDED.total_time_minutes,
+        total_price = core_recipestats.total_price + EXCLUDED.total_price;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION core_recipe_stats_update() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO core_recipestats
+        (user_id, recipe_count, total_time_minutes, total_price)
+    SELECT user_id, sum(recipe_count), sum(time_minutes), sum(price)
+    FROM (
+        SELECT user_id, 1 AS recipe_count, time_minutes, price
+        FROM new_recipes
+        UNION ALL
+        SELECT user_id, -1, -time_minutes, -price
+        FROM old_recipes
+    ) AS changes
+    GROUP BY user_id
+    HAVING sum(recipe_count) <> 0
+        OR sum(time_minutes) <> 0
+        OR sum(price) <> 0
+    ORDER BY user_id
+    ON CONFLICT (user_id) DO UPDATE SET
+        recipe_count =
+            core_recipestats.recipe_count + EXCLUDED.recipe_count,
+        total_time_minutes =
+            core_recipestats.total_time_minutes
+            + EXCLUDED.total_time_minutes,
+        total_price = core_recipestats.total_price + EXCLUDED.total_price;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+-- An UPDATE, not an upsert: deleting a user deletes its stats row
+-- before its recipes, there's no row to bring back.
+CREATE FUNCTION core_recipe_stats_delete() RETURNS trigger AS $$
+BEGIN
+    PERFORM 1 FROM core_recipestats
+    WHERE user_id IN (SELECT user_id FROM old_recipes)
+    ORDER BY user_id
+    FOR UPDATE;
+
+    UPDATE core_recipestats SET
+        recipe_count = core_recipestats.recipe_count - deleted.recipe_count,
+        total_time_minutes =
+            core_recipestats.total_time_minutes - deleted.time_minutes,
+        total_price = core_recipestats.total_price - deleted.price
+    FROM (
+        SELECT user_id, count(*) AS recipe_count,
+            sum(time_minutes) AS time_minutes, sum(price) AS price
+        FROM old_recipes
+        GROUP BY user_id
+    ) AS deleted
+    WHERE core_recipestats.user_id = deleted.user_id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_recipe_stats_insert_trigger
+AFTER INSERT ON core_recipe
+REFERENCING NEW TABLE AS new_recipes
+FOR EACH STATEMENT EXECUTE FUNCTION core_recipe_stats_insert();
+
+CREATE TRIGGER core_recipe_stats_update_trigger
+AFTER UPDATE ON core_recipe
+REFERENCING OLD TABLE AS old_recipes NEW TABLE AS new_recipes
+FOR EACH STATEMENT EXECUTE FUNCTION core_recipe_stats_update();
+
+CREATE TRIGGER core_recipe_stats_delete_trigger
+AFTER DELETE ON core_recipe
+REFERENCING OLD TABLE AS old_recipes
+FOR EACH STATEMENT EXECUTE FUNCTION core_recipe_stats_delete();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER core_recipe_stats_insert_trigger ON core_recipe;
+DROP TRIGGER core_recipe_stats_update_trigger ON core_recipe;
+DROP TRIGGER core_recipe_stats_delete_trigger ON core_recipe;
+DROP FUNCTION core_recipe_stats_insert();
+DROP FUNCTION core_recipe_stats_update();
+DROP FUNCTION core_recipe_stats_delete();
+""" + recipe_stats.CREATE_TRIGGER
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
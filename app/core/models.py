@@ -1,14 +1,21 @@
 """
 Database models.
 """
+from decimal import Decimal
+
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 
+from core.signals import recipes_changed
+
 
 class UserManager(BaseUserManager):
     """Manager for users."""
@@ -64,6 +71,47 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+# QuerySet.update, bulk_create and bulk_update do not send post_save,
+# so they announce the change with the recipes_changed signal instead.
+# This keeps caches and other derived data right for bulk edits too.
+class RecipeQuerySet(models.QuerySet):
+    """QuerySet for recipes that reports bulk changes."""
+
+    def update(self, **kwargs):
+        # update() skips auto_now, keep updated_at right ourselves
+        kwargs.setdefault('updated_at', timezone.now())
+        # Owners must be read before the update, it may change them
+        user_ids = set(self.values_list('user_id', flat=True).distinct())
+        rows = super().update(**kwargs)
+        # Moving recipes to another user changes that user's recipes too
+        new_user = kwargs.get('user', kwargs.get('user_id'))
+        if new_user is not None:
+            user_ids.add(getattr(new_user, 'pk', new_user))
+        recipes_changed.send(sender=self.model, user_ids=user_ids)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        recipes_changed.send(
+            sender=self.model,
+            user_ids={obj.user_id for obj in objs},
+        )
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        # bulk_update() skips auto_now, keep updated_at right ourselves
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        fields = {*fields, 'updated_at'}
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        recipes_changed.send(
+            sender=self.model,
+            user_ids={obj.user_id for obj in objs},
+        )
+        return rows
+
+
 class Recipe(models.Model):
     """Recipe Object."""
     # Stored the user. Using ForeigKey because it allows us
@@ -85,9 +133,188 @@ class Recipe(models.Model):
     time_minutes = models.IntegerField()
     price = models.DecimalField(max_digits=5, decimal_places=2)
     link = models.CharField(max_length=255,blank=True)
+    # Set on every save. Used for ETag/Last-Modified on the API
+    updated_at = models.DateTimeField(auto_now=True)
+    # Full-text search document built from the title and description.
+    # A database trigger (see migration 0006) keeps it up to date, so
+    # bulk updates and raw SQL are covered too.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Every recipe list call filters by user and sorts by -id.
+            # With this index PostgreSQL walks the user's rows already
+            # in order, so there is no sort step and cursor pages are
+            # a range scan.
+            models.Index(
+                fields=['user', '-id'],
+                name='recipe_user_id_desc_idx',
+            ),
+            # Delta sync reads the user's recipes changed after a point
+            # in time, in (updated_at, id) order.
+            models.Index(
+                fields=['user', 'updated_at', 'id'],
+                name='recipe_user_updated_idx',
+            ),
+            # Range filters and ?ordering= on the recipe list
+            models.Index(
+                fields=['user', 'time_minutes', 'id'],
+                name='recipe_user_time_idx',
+            ),
+            models.Index(
+                fields=['user', 'price', 'id'],
+                name='recipe_user_price_idx',
+            ),
+            models.Index(
+                fields=['user', 'title', 'id'],
+                name='recipe_user_title_idx',
+            ),
+            # ?search= : full-text matches on title/description
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx',
+            ),
+            # ?search= : trigram matches on the title, for typos
+            GinIndex(
+                fields=['title'],
+                name='recipe_title_trgm_idx',
+                opclasses=['gin_trgm_ops'],
+            ),
+        ]
 
     # The special method to return the string representation of this object
     def __str__(self) -> str:
         return self.title
 
 
+class RecipeTombstone(models.Model):
+    """Record of a deleted recipe, used by delta sync."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    # Plain integer, the recipe row no longer exists
+    recipe_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Delta sync reads the user's deletions after a point in
+            # time, in (deleted_at, id) order.
+            models.Index(
+                fields=['user', 'deleted_at', 'id'],
+                name='tombstone_user_deleted_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'Deleted recipe {self.recipe_id}'
+
+
+class RecipeStats(models.Model):
+    """Running totals of a user's recipes."""
+    # One row per user that has ever had a recipe. Database triggers
+    # (see migration 0011) add and subtract the recipes each statement
+    # inserts, updates or deletes, so reading the stats never scans
+    # core_recipe. Bulk updates and raw SQL are covered too.
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='recipe_stats',
+    )
+    recipe_count = models.BigIntegerField(default=0)
+    total_time_minutes = models.BigIntegerField(default=0)
+    total_price = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        default=Decimal('0.00'),
+    )
+
+    @property
+    def average_time_minutes(self):
+        """Average cooking time, or None when there are no recipes."""
+        if not self.recipe_count:
+            return None
+        return self.total_time_minutes / self.recipe_count
+
+    @property
+    def average_price(self):
+        """Average price, or None when there are no recipes."""
+        if not self.recipe_count:
+            return None
+        return (self.total_price / self.recipe_count).quantize(
+            Decimal('0.01'),
+        )
+
+    def __str__(self) -> str:
+        return f'Recipe stats of {self.user}'
+
+
+class RequestProfile(models.Model):
+    """Profile of one request, captured by core.profiling."""
+    TRIGGER_HEADER = 'header'
+    TRIGGER_SAMPLE = 'sample'
+    TRIGGER_CHOICES = [
+        (TRIGGER_HEADER, 'Signed header'),
+        (TRIGGER_SAMPLE, 'Sampling'),
+    ]
+
+    created_at = models.DateTimeField(default=timezone.now)
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    # URL name of the endpoint, e.g. recipe:recipe-list
+    endpoint = models.CharField(max_length=255)
+    method = models.CharField(max_length=10)
+    path = models.TextField()
+    status_code = models.PositiveSmallIntegerField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    db_ms = models.FloatField()
+    # Functions with the most own time: list of {function, calls,
+    # own_ms, cumulative_ms}
+    hot_functions = models.JSONField(default=list)
+    # Queries in the order they ran: list of {start_ms, duration_ms,
+    # sql}
+    sql_timeline = models.JSONField(default=list)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='profile_created_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.method} {self.path} ({self.duration_ms:.0f} ms)'
+
+
+class ImportCheckpoint(models.Model):
+    """Rows of a file already imported by the import_recipes command."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    # The file, as it was: a file rewritten in place starts over
+    path = models.TextField()
+    size = models.BigIntegerField()
+    mtime_ns = models.BigIntegerField()
+    rows = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'path', 'size', 'mtime_ns'],
+                name='import_checkpoint_file_uniq',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.path}: {self.rows} rows'
@@ -0,0 +1,201 @@
+"""
+Opt-in request profiler.
+
+A request is profiled when it carries a valid signed X-Profile header
+(see `python manage.py profiling_header`), or when it is picked by
+PROFILING_SAMPLE_RATE. It then runs under cProfile with every SQL query
+timed, and a RequestProfile row records the functions with the most
+own time and the SQL timeline. Recent profiles are listed in the admin.
+
+Other requests only pay for a header lookup and a random number.
+"""
+import cProfile
+import pstats
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import (
+    async_to_sync,
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.core import signing
+from django.db import DatabaseError, connections
+
+from core import asyncviews, metrics
+from core.models import RequestProfile
+
+SIGNING_SALT = 'core.profiling'
+SIGNED_VALUE = 'profile'
+# Longest SQL statement kept in a timeline
+SQL_MAX_LENGTH = 2000
+
+
+def make_header_value():
+    """Return a signed X-Profile header value."""
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign(SIGNED_VALUE)
+
+
+def get_trigger(request):
+    """Return why the request should be profiled, None if it shouldn't."""
+    header = request.META.get('HTTP_X_PROFILE')
+    if header:
+        try:
+            value = signing.TimestampSigner(salt=SIGNING_SALT).unsign(
+                header,
+                max_age=settings.PROFILING_SIGNATURE_MAX_AGE,
+            )
+        except signing.BadSignature:
+            # Forged or expired: served like any other request
+            value = None
+        if value == SIGNED_VALUE:
+            return RequestProfile.TRIGGER_HEADER
+    rate = settings.PROFILING_SAMPLE_RATE
+    if rate and random.random() < rate:
+        return RequestProfile.TRIGGER_SAMPLE
+    return None
+
+
+class SqlTimeline:
+    """Database execute wrapper recording when each query ran."""
+
+    def __init__(self, started):
+        self.started = started
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            # Statements only: parameters may hold personal data
+            self.queries.append({
+                'start_ms': (started - self.started) * 1000,
+                'duration_ms': (time.perf_counter() - started) * 1000,
+                'sql': sql[:SQL_MAX_LENGTH],
+            })
+
+
+def hot_functions(profiler, limit):
+    """Return the `limit` functions with the most own time."""
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)
+    return [
+        {
+            'function': pstats.func_std_string(function),
+            'calls': calls,
+            'own_ms': own_time * 1000,
+            'cumulative_ms': cumulative_time * 1000,
+        }
+        for function, (_, calls, own_time, cumulative_time, _)
+        in rows[:limit]
+    ]
+
+
+class ProfilingMiddleware:
+    """Profile requests picked by get_trigger()."""
+    # cProfile only sees the thread it runs in, so a profiled request
+    # runs in one thread, views included, even under ASGI (see
+    # core.asyncviews). Last in MIDDLEWARE, it covers authentication,
+    # the ORM, serialization and rendering.
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            # Tells Django the middleware is async itself
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        trigger = get_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        return self.profile(request, trigger, self.get_response)
+
+    async def __acall__(self, request):
+        trigger = get_trigger(request)
+        if trigger is None:
+            return await self.get_response(request)
+        with asyncviews.single_thread():
+            return await sync_to_async(self.profile, thread_sensitive=True)(
+                request, trigger, async_to_sync(self.get_response),
+            )
+
+    def profile(self, request, trigger, get_response):
+        """Return the response of get_response, profiled."""
+        started = time.perf_counter()
+        timeline = SqlTimeline(started)
+        profiler = cProfile.Profile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timeline))
+            profiler.enable()
+            try:
+                # Rendered already: Django renders DRF responses below
+                # the innermost middleware
+                response = get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - started
+
+        profile = RequestProfile(
+            trigger=trigger,
+            endpoint=getattr(request.resolver_match, 'view_name', '')
+            or '<unresolved>',
+            method=request.method,
+            path=request.get_full_path(),
+            status_code=response.status_code,
+            user=self.get_user(request),
+            duration_ms=duration * 1000,
+            query_count=len(timeline.queries),
+            db_ms=sum(query['duration_ms'] for query in timeline.queries),
+            hot_functions=hot_functions(
+                profiler,
+                settings.PROFILING_TOP_FUNCTIONS,
+            ),
+            sql_timeline=timeline.queries,
+        )
+        if response.streaming:
+            # The body is generated as it is sent: saved once it is
+            response.streaming_content = self.save_after(
+                response.streaming_content,
+                profile,
+            )
+        else:
+            self.save(profile)
+        return response
+
+    def save_after(self, content, profile):
+        """Yield the streamed content, then save the profile."""
+        try:
+            yield from content
+        finally:
+            self.save(profile)
+
+    def get_user(self, request):
+        """Return the authenticated user of the request, if any."""
+        # Set by DRF on the Django request when it authenticates
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user
+        return None
+
+    def save(self, profile):
+        """Store a profile and drop the oldest beyond PROFILING_KEEP."""
+        # Not one of the request's queries, nor in its query budget
+        try:
+            with metrics.not_measured():
+                profile.save()
+                RequestProfile.objects.filter(
+                    pk__lte=profile.pk - settings.PROFILING_KEEP,
+                ).delete()
+        except DatabaseError:
+            # A profile is never worth failing the request for
+            pass
@@ -0,0 +1,181 @@
+"""
+Prometheus metrics, served at /metrics.
+
+Collected with prometheus_client: request rate and latency per
+endpoint, SQL queries per request, connection pool usage, cache hit
+rates and authentication failures.
+
+With several worker processes, set PROMETHEUS_MULTIPROC_DIR to an
+empty directory shared by the workers before they start: every process
+then writes its values to memory-mapped files there, and /metrics adds
+up the files of all processes, whichever worker serves the scrape. A
+worker that exits should be reported with mark_process_dead(pid) (e.g.
+from gunicorn's child_exit hook) so its gauges are dropped.
+
+Updating a metric is a few in-memory (or mmap) writes; the pool gauges
+are refreshed at most every METRICS_POOL_INTERVAL seconds per process.
+Everything is a no-op when prometheus_client isn't installed.
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from core.db.pool import get_pool_stats
+
+# prometheus_client is optional, without it nothing is collected and
+# /metrics answers 501.
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Pool counters, exported as the increase since the last refresh
+POOL_COUNTERS = ('connects', 'reuses', 'waits', 'timeouts',
+                 'health_check_failures', 'recycled', 'discarded')
+
+if prometheus_client is not None:
+    REQUESTS = prometheus_client.Counter(
+        'http_requests',
+        'HTTP requests, by endpoint (URL name), method and status.',
+        ['endpoint', 'method', 'status'],
+    )
+    LATENCY = prometheus_client.Histogram(
+        'http_request_duration_seconds',
+        'Time to respond to a request, by endpoint.',
+        ['endpoint'],
+        buckets=LATENCY_BUCKETS,
+    )
+    QUERIES = prometheus_client.Histogram(
+        'http_request_db_queries',
+        'SQL queries made by a request, by endpoint.',
+        ['endpoint'],
+        buckets=QUERY_BUCKETS,
+    )
+    DB_TIME = prometheus_client.Histogram(
+        'http_request_db_duration_seconds',
+        'Time spent in SQL queries by a request, by endpoint.',
+        ['endpoint'],
+        buckets=LATENCY_BUCKETS,
+    )
+    SERIALIZATION_TIME = prometheus_client.Histogram(
+        'http_request_serialization_duration_seconds',
+        'Time spent serializing objects to response data, by endpoint.',
+        ['endpoint'],
+        buckets=LATENCY_BUCKETS,
+    )
+    POOL_CONNECTIONS = prometheus_client.Gauge(
+        'db_pool_connections',
+        'Pooled database connections, by alias and state.',
+        ['alias', 'state'],
+        multiprocess_mode='livesum',
+    )
+    POOL_EVENTS = prometheus_client.Counter(
+        'db_pool_events',
+        'Database pool events (connects, reuses, timeouts...), by alias.',
+        ['alias', 'event'],
+    )
+    CACHE_REQUESTS = prometheus_client.Counter(
+        'cache_requests',
+        'Cache lookups, by cache and result (hit or miss).',
+        ['cache', 'result'],
+    )
+    AUTH_FAILURES = prometheus_client.Counter(
+        'auth_failures',
+        'Failed authentications: bad API tokens and failed logins.',
+        ['kind'],
+    )
+
+
+def observe_request(request_metrics, method, status):
+    """Record a finished request."""
+    if prometheus_client is None:
+        return
+    endpoint = request_metrics.endpoint
+    REQUESTS.labels(endpoint, method, str(status)).inc()
+    LATENCY.labels(endpoint).observe(request_metrics.total_time)
+    QUERIES.labels(endpoint).observe(request_metrics.queries)
+    DB_TIME.labels(endpoint).observe(request_metrics.db_time)
+    SERIALIZATION_TIME.labels(endpoint).observe(
+        request_metrics.serialization_time,
+    )
+    _pool_poller.maybe_refresh()
+
+
+def cache_lookup(cache, hit):
+    """Record a hit or a miss of one of our caches."""
+    if prometheus_client is not None:
+        CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def auth_failure(kind):
+    """Record a failed authentication."""
+    if prometheus_client is not None:
+        AUTH_FAILURES.labels(kind).inc()
+
+
+class PoolPoller:
+    """Copies the connection pool stats of this process to the metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_refresh = 0
+        self._last_counts = {}
+
+    def maybe_refresh(self):
+        """Refresh, unless done less than METRICS_POOL_INTERVAL ago."""
+        now = time.monotonic()
+        # Checked without the lock first: nearly every call stops here
+        if now < self._next_refresh:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_refresh = now + settings.METRICS_POOL_INTERVAL
+            self.refresh()
+        finally:
+            self._lock.release()
+
+    def refresh(self):
+        for stats in get_pool_stats():
+            alias = stats['alias']
+            POOL_CONNECTIONS.labels(alias, 'in_use').set(stats['in_use'])
+            POOL_CONNECTIONS.labels(alias, 'idle').set(stats['idle'])
+            for event in POOL_COUNTERS:
+                key = (alias, stats['database'], event)
+                increase = stats[event] - self._last_counts.get(key, 0)
+                if increase < 0:
+                    # The pool started over, e.g. in a forked worker
+                    increase = stats[event]
+                self._last_counts[key] = stats[event]
+                if increase > 0:
+                    POOL_EVENTS.labels(alias, event).inc(increase)
+
+
+_pool_poller = PoolPoller()
+
+
+def generate_latest():
+    """Return (body, content type) of the metrics, or None if disabled."""
+    if prometheus_client is None:
+        return None
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        # A registry per scrape, reading the files of every process
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return (prometheus_client.generate_latest(registry),
+            prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead(pid):
+    """Drop the live gauges of a worker process that exited."""
+    if prometheus_client is not None and \
+            'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,74 @@
+"""
+Renderers for the API.
+"""
+import msgpack
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# orjson is optional. Without it ORJSONRenderer is the plain
+# JSONRenderer, so settings don't have to change per environment.
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Types orjson and msgpack don't serialize themselves (Decimal, lazy
+# translations, timedelta, querysets...) are converted the same way as
+# DRF does for JSON.
+_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    """Convert an object the encoder doesn't know to a JSON type."""
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON renderer built on orjson, with the output of JSONRenderer."""
+    # Dict keys that are not strings (e.g. list indexes in bulk
+    # errors) are written as strings, like json.dumps does.
+    # Datetimes in UTC end with 'Z', like DRF's DateTimeField.
+    orjson_options = (
+        orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z if orjson else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON, returning a bytestring."""
+        if data is None:
+            return b''
+
+        # orjson has no options for indented or ASCII only output, so
+        # those (rare) requests go through the stdlib renderer.
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if orjson is None or indent or self.ensure_ascii:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=encode_default,
+            option=self.orjson_options,
+        )
+        # Same as JSONRenderer: escape the two line separators that are
+        # valid JSON but not valid JavaScript.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028')
+            ret = ret.replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renderer for MessagePack, a compact binary form of JSON."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into MessagePack, returning a bytestring."""
+        if data is None:
+            return b''
+        # Datetimes are packed as ISO 8601 strings through
+        # encode_default, like in JSON.
+        return msgpack.packb(data, default=encode_default)
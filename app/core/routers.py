@@ -0,0 +1,118 @@
+"""
+Read replica routing.
+
+Reads go to the primary (`default`) unless a view opts in with
+ReplicaReadMixin: its GET requests then read from a replica of
+DATABASE_REPLICAS, picked at random once per request. Replicas don't
+lag by the same amount, so every read of a request goes to the same
+one: an ETag computed on one replica must describe the body read from
+it. Writes always go to the primary.
+
+Replicas lag behind the primary, so a user who just wrote something
+could read an older copy of it, and store it in the response cache.
+Every write request, and every change to a user's recipes or profile
+(admin, import_recipes, bulk updates...), pins the user to the primary
+for REPLICA_STICKY_SECONDS to avoid that; it must be longer than the
+replicas' lag.
+"""
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.permissions import SAFE_METHODS
+
+# Alias of the replica the current request reads from, if any
+_use_replicas = contextvars.ContextVar('use_replicas', default=None)
+
+
+def choose_replica():
+    """Return the alias of the replica to read from."""
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+class ReplicaRouter:
+    """Send reads of opted in requests to replicas, writes to primary."""
+
+    def db_for_read(self, model, **hints):
+        return _use_replicas.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or Django would write an instance back to the
+        # replica it was read from.
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return db not in settings.DATABASE_REPLICAS
+
+
+def _pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+def _pin(user_ids):
+    caches[settings.REPLICA_STICKY_CACHE_ALIAS].set_many(
+        {_pin_key(user_id): True for user_id in user_ids},
+        settings.REPLICA_STICKY_SECONDS,
+    )
+
+
+def pin_to_primary(user):
+    """Send the user's reads to the primary for a while."""
+    pin_users_to_primary([user.pk])
+
+
+def pin_users_to_primary(user_ids):
+    """Send the reads of the given users to the primary for a while."""
+    user_ids = set(user_ids)
+    if not user_ids or not settings.DATABASE_REPLICAS:
+        return
+    _pin(user_ids)
+    # Replicas only start catching up once the change is committed,
+    # so start the window over then.
+    transaction.on_commit(lambda: _pin(user_ids))
+
+
+def is_pinned(user):
+    """Return whether the user wrote recently."""
+    return caches[settings.REPLICA_STICKY_CACHE_ALIAS].get(
+        _pin_key(user.pk),
+        False,
+    )
+
+
+class ReplicaReadMixin:
+    """Serve the GET requests of an API view from a replica."""
+    # Authentication runs on the primary, before initial() opts in.
+    # Actions (viewset action names) that always read from the primary
+    primary_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and getattr(self, 'action', None) not in self.primary_actions
+            and settings.DATABASE_REPLICAS
+            and not (request.user.is_authenticated
+                     and is_pinned(request.user))
+        ):
+            self._replica_token = _use_replicas.set(choose_replica())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _use_replicas.reset(token)
+            self._replica_token = None
+        if (
+            request.method not in SAFE_METHODS
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args,
+                                         **kwargs)
@@ -0,0 +1,41 @@
+"""
+Custom signals sent by the core models, and core signal handlers.
+"""
+from django.contrib.auth.hashers import get_hashers
+from django.contrib.auth.signals import user_login_failed
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+from django.dispatch import Signal, receiver
+
+from core import hashing, metrics, prometheus
+
+
+# Sent by RecipeQuerySet after update(), bulk_create() and bulk_update(),
+# which skip the per-object post_save signal.
+# Arguments: sender (the Recipe model), user_ids (set of owners whose
+# recipes changed).
+recipes_changed = Signal()
+
+
+# Lets tests change the work factor with override_settings
+@receiver(setting_changed)
+def reset_hashers_on_setting_change(sender, setting, **kwargs):
+    """Rebuild the hashers when their iteration count changes."""
+    if setting == 'PASSWORD_PBKDF2_ITERATIONS':
+        get_hashers.cache_clear()
+    elif setting == 'PASSWORD_HASHING_CONCURRENCY':
+        hashing.reset_slots()
+
+
+@receiver(connection_created)
+def count_queries(sender, connection, **kwargs):
+    """Count the queries of each connection in the request metrics."""
+    # A wrapper object outlives its connections, add the hook once
+    if metrics.record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.record_query)
+
+
+@receiver(user_login_failed)
+def count_login_failure(sender, credentials, **kwargs):
+    """Count failed logins (wrong email or password)."""
+    prometheus.auth_failure('login')
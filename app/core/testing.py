@@ -0,0 +1,24 @@
+"""
+Test helpers shared by the apps.
+"""
+from django.conf import settings
+
+
+class QueryBudgetMixin:
+    """Assert responses stay within the query budget of their endpoint."""
+    # Budgets are declared in settings.QUERY_BUDGETS, per URL name, and
+    # counted by core.middleware.RequestMetricsMiddleware.
+
+    def assertWithinQueryBudget(self, response):
+        metrics = response.request_metrics
+        budget = settings.QUERY_BUDGETS.get(metrics.endpoint)
+        self.assertIsNotNone(
+            budget,
+            f'No query budget for {metrics.endpoint} in QUERY_BUDGETS.',
+        )
+        self.assertLessEqual(
+            metrics.queries,
+            budget,
+            f'{metrics.endpoint} made {metrics.queries} queries, over its '
+            f'budget of {budget}.',
+        )
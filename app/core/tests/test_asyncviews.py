@@ -0,0 +1,85 @@
+"""
+Tests for the async API views.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from django.urls import resolve, reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.db import pool
+from core.models import RequestProfile
+from core.profiling import make_header_value
+from recipe.tests.test_recipe_api import create_recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+ME_URL = reverse('user:me')
+
+
+def in_use():
+    """Return the number of connections checked out of the pools."""
+    return sum(stats['in_use'] for stats in pool.get_pool_stats())
+
+
+class AsyncViewTests(TestCase):
+    """Test which views are served from a coroutine."""
+
+    def test_views_are_coroutines(self):
+        """Test the recipe and user views are coroutines."""
+        for url in (RECIPES_URL, ME_URL):
+            self.assertTrue(asyncio.iscoroutinefunction(resolve(url).func))
+
+
+class AsgiRequestTests(TransactionTestCase):
+    """Test the async views served through the ASGI handler."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        create_recipe(user=self.user, title='Sample recipe')
+        self.token = Token.objects.create(user=self.user)
+        self.client = AsyncClient()
+
+    async def get(self, url, **extra):
+        extra.setdefault('AUTHORIZATION', f'Token {self.token.key}')
+        return await self.client.get(url, **extra)
+
+    async def test_list_recipes(self):
+        """Test listing recipes, the connection is given back."""
+        before = in_use()
+
+        res = await self.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['results'][0]['title'], 'Sample recipe')
+        self.assertEqual(in_use(), before)
+
+    async def test_retrieve_user(self):
+        """Test retrieving the authenticated user."""
+        res = await self.get(ME_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['email'], self.user.email)
+
+    async def test_unauthenticated(self):
+        """Test a request without a token is refused."""
+        res = await self.get(RECIPES_URL, AUTHORIZATION='')
+
+        self.assertEqual(res.status_code, 401)
+
+    async def test_profiled(self):
+        """Test a profiled request is profiled, views included."""
+        await self.get(RECIPES_URL, X_PROFILE=make_header_value())
+
+        profile = await sync_to_async(RequestProfile.objects.get)()
+        self.assertEqual(profile.endpoint, 'recipe:recipe-list')
+        self.assertIn('core_recipe', ' '.join(
+            query['sql'] for query in profile.sql_timeline
+        ))
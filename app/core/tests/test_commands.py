@@ -1,57 +1,415 @@
 """
 Test custom Django management commands.
 """
+import json
+import os
+import tempfile
+import threading
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
 # path mocks the behavior of the database
-from unittest.mock import patch
+from unittest.mock import ANY, patch
 # display database errors
 from psycopg2 import OperationalError as Psycopg2Error
 # helper function which allows to simulate/call
 # the command we are testing by the name
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
 # another error that might be thrown by the database
 from django.db.utils import OperationalError
 # base test class for testing our unit test
-from django.test import SimpleTestCase
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from core import models
+from core.management.commands.import_recipes import get_checkpoint
+from core.management.commands.wait_for_db import Command
+from core.profiling import get_trigger
 
 
 # mocks behavior of database (mock object)
-@patch('core.management.commands.wait_for_db.Command.check')
+@patch('core.management.commands.wait_for_db.Command.probe')
 # class we are creating is based from SimpleTestCase
 class CommandTest(SimpleTestCase):
     """Test Command."""
     # one possible test case where we wait for database.
-    # patched_check object replaces check by patch,
+    # patched_probe object replaces probe by patch,
     # we use it now to cumstimize our behavior
-    def test_wait_for_db_ready(self, patched_check):
+    def test_wait_for_db_ready(self, patched_probe):
         """Test waiting for database if database ready."""
-        # when we call check inside out test_scase,
+        # when we call probe inside out test_scase,
         # we want to just return a value
-        patched_check.return_value = True
+        patched_probe.return_value = None
 
-        call_command('wait_for_db')  # execute the command
+        call_command('wait_for_db', stdout=StringIO())  # execute the command
 
-        # Ensures that mock object is called w/ parameter database=['default']
-        patched_check.assert_called_once_with(databases=['default'])
+        # Ensures that mock object is called with the default database
+        patched_probe.assert_called_once_with('default', ANY)
 
     # patch to mock the sleep method.
     # Note: postion of the parameter below correspond
     # to each @patch from the inside out
     @patch('time.sleep')
-    def test_wait_for_db_delay(self, patched_sleep, patched_check):
+    def test_wait_for_db_delay(self, patched_sleep, patched_probe):
         """Test waiting for database when getting Operational Error"""
         # To raise an exception we use side_effect.
         # First 2 times we call the mock object,
         # we raise Psy..Error, next 3 times we raise the operational error.
         # Two and three are arbitrery values.
-        # The six time we call it, we get True
-        patched_check.side_effect = [Psycopg2Error] * 2 \
-            + [OperationalError] * 3 + [True]
+        # The six time we call it, we get None
+        patched_probe.side_effect = [Psycopg2Error] * 2 \
+            + [OperationalError] * 3 + [None]
 
         # Call command
-        call_command('wait_for_db')
+        call_command('wait_for_db', stdout=StringIO())
 
         # test to check if we get 6 calls to the mock call object
-        self.assertEqual(patched_check.call_count, 6)
+        self.assertEqual(patched_probe.call_count, 6)
+
+        # making sure that pactched_probe is called with the default database
+        patched_probe.assert_called_with('default', ANY)
+
+    @patch('time.sleep')
+    def test_wait_for_db_backoff(self, patched_sleep, patched_probe):
+        """Test the waits double from the initial delay up to the max."""
+        patched_probe.side_effect = [OperationalError] * 5 + [None]
+
+        with patch('random.uniform', side_effect=lambda low, high: high):
+            call_command('wait_for_db', '--initial-delay=0.01',
+                         '--max-delay=0.05', stdout=StringIO())
+
+        self.assertEqual(
+            [call.args[0] for call in patched_sleep.call_args_list],
+            [0.01, 0.02, 0.04, 0.05, 0.05],
+        )
+
+    def test_wait_for_db_timeout(self, patched_probe):
+        """Test giving up once the timeout has passed."""
+        patched_probe.side_effect = OperationalError('connection refused')
+
+        with self.assertRaisesMessage(CommandError, 'connection refused'):
+            call_command('wait_for_db', '--timeout=0.05',
+                         '--initial-delay=0.01', stdout=StringIO())
+
+    def test_wait_for_several_databases(self, patched_probe):
+        """Test waiting on every given alias and reporting each."""
+        stdout = StringIO()
+        with patch.dict(connections.databases, {'other': {}}):
+            call_command('wait_for_db', '--database=default',
+                         '--database=other', stdout=stdout)
+
+        self.assertEqual(
+            sorted(call.args[0] for call in patched_probe.call_args_list),
+            ['default', 'other'],
+        )
+        self.assertIn('Database "other" ready after', stdout.getvalue())
+
+    def test_wait_for_unknown_database(self, patched_probe):
+        """Test an unknown alias fails at once."""
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', '--database=missing',
+                         stdout=StringIO())
+
+        patched_probe.assert_not_called()
+
+
+class ProbeTest(SimpleTestCase):
+    """Test the connection wait_for_db probes with."""
+
+    @patch('psycopg2.connect', side_effect=Psycopg2Error('timeout'))
+    def test_connect_timeout(self, patched_connect):
+        """Test each attempt connects with the time left as timeout."""
+        with self.assertRaises(OperationalError):
+            Command().probe('default', 2.5)
+        with self.assertRaises(OperationalError):
+            Command().probe('default', 0.2)
+
+        self.assertEqual(
+            [call.kwargs['connect_timeout']
+             for call in patched_connect.call_args_list],
+            [3, 1],
+        )
+
+
+class ImportRecipesCommandTest(TestCase):
+    """Test the import_recipes command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        # Temporary folder for the import files, removed after the test
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+
+    def write_file(self, name, content):
+        """Write content to a file in the temporary folder."""
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def write_ndjson(self, rows):
+        """Write rows to an NDJSON file and return its path."""
+        return self.write_file(
+            'recipes.ndjson',
+            ''.join(json.dumps(row) + '\n' for row in rows),
+        )
+
+    def import_recipes(self, path, **options):
+        """Run the command quietly and return its stderr output."""
+        stderr = StringIO()
+        call_command(
+            'import_recipes', path, user=self.user.email,
+            stdout=StringIO(), stderr=stderr, **options
+        )
+        return stderr.getvalue()
+
+    def test_import_ndjson(self):
+        """Test importing recipes from an NDJSON file."""
+        path = self.write_ndjson([
+            {'title': f'Recipe {i}', 'time_minutes': i, 'price': '1.50'}
+            for i in range(5)
+        ])
+
+        self.import_recipes(path, batch_size=2)
+
+        recipes = models.Recipe.objects.filter(user=self.user).order_by('id')
+        self.assertEqual(
+            [recipe.title for recipe in recipes],
+            [f'Recipe {i}' for i in range(5)],
+        )
+        self.assertEqual(recipes[0].price, Decimal('1.50'))
+
+    def test_import_csv(self):
+        """Test importing recipes from a CSV file."""
+        path = self.write_file(
+            'recipes.csv',
+            'title,time_minutes,price,link\n'
+            '"Soup, hot",10,2.00,\n'
+            'Salad,5,3.25,http://example.com\n',
+        )
+
+        self.import_recipes(path)
+
+        self.assertEqual(
+            sorted(models.Recipe.objects.values_list('title', flat=True)),
+            ['Salad', 'Soup, hot'],
+        )
+
+    def test_invalid_rows_skipped(self):
+        """Test invalid rows are reported and the rest imported."""
+        path = self.write_ndjson([
+            {'title': 'Good', 'time_minutes': 1, 'price': '1.00'},
+            {'title': 'Bad', 'time_minutes': 'abc', 'price': '1.00'},
+        ])
+
+        errors = self.import_recipes(path)
+
+        self.assertIn('Row 2', errors)
+        self.assertEqual(
+            list(models.Recipe.objects.values_list('title', flat=True)),
+            ['Good'],
+        )
+
+    def test_import_utf8(self):
+        """Test files are read as UTF-8."""
+        path = self.write_ndjson([
+            {'title': 'Crème brûlée', 'time_minutes': 30, 'price': '4.00'},
+        ])
+
+        self.import_recipes(path)
+
+        self.assertEqual(models.Recipe.objects.get().title, 'Crème brûlée')
+
+    def test_resume_from_checkpoint(self):
+        """Test rows before the checkpoint are not imported again."""
+        path = self.write_ndjson([
+            {'title': f'Recipe {i}', 'time_minutes': i, 'price': '1.00'}
+            for i in range(4)
+        ])
+        checkpoint = get_checkpoint(path, self.user)
+        checkpoint.rows = 2
+        checkpoint.save()
+
+        self.import_recipes(path, resume=True)
+
+        self.assertEqual(
+            sorted(models.Recipe.objects.values_list('title', flat=True)),
+            ['Recipe 2', 'Recipe 3'],
+        )
+        checkpoint.refresh_from_db()
+        self.assertEqual(checkpoint.rows, 4)
+
+        # Running again imports nothing
+        self.import_recipes(path, resume=True)
+        self.assertEqual(models.Recipe.objects.count(), 2)
+
+    def test_checkpoint_per_file_and_user(self):
+        """Test a changed file or another user starts from the top."""
+        path = self.write_ndjson([
+            {'title': f'Recipe {i}', 'time_minutes': i, 'price': '1.00'}
+            for i in range(2)
+        ])
+        self.import_recipes(path, resume=True)
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+
+        call_command('import_recipes', path, user=other.email, resume=True,
+                     stdout=StringIO())
+        self.assertEqual(models.Recipe.objects.filter(user=other).count(), 2)
+
+        path = self.write_ndjson([
+            {'title': f'Recipe {i}', 'time_minutes': i, 'price': '1.00'}
+            for i in range(3)
+        ])
+        self.import_recipes(path, resume=True)
+        self.assertEqual(
+            models.Recipe.objects.filter(user=self.user).count(), 5,
+        )
+        self.assertEqual(models.ImportCheckpoint.objects.count(), 3)
+
+    def test_checkpoint_saved_with_batch(self):
+        """Test a batch isn't kept when its checkpoint can't be saved."""
+        path = self.write_ndjson([
+            {'title': f'Recipe {i}', 'time_minutes': i, 'price': '1.00'}
+            for i in range(4)
+        ])
+
+        # Another run moves the checkpoint under this one
+        with patch.object(models.ImportCheckpoint.objects, 'filter',
+                          return_value=models.ImportCheckpoint.objects.none()):
+            with self.assertRaises(CommandError):
+                self.import_recipes(path, resume=True, batch_size=2)
+
+        self.assertFalse(models.Recipe.objects.exists())
+        self.assertEqual(get_checkpoint(path, self.user).rows, 0)
+
+    def test_invalid_batch_size(self):
+        """Test a batch size below 1 is refused."""
+        path = self.write_ndjson([])
+
+        with self.assertRaisesMessage(CommandError, '--batch-size'):
+            self.import_recipes(path, batch_size=0)
+
+    def test_unknown_user(self):
+        """Test importing for a user that does not exist fails."""
+        path = self.write_ndjson([])
+
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', path, user='nobody@example.com')
+
+
+class BenchmarkRenderersCommandTest(SimpleTestCase):
+    """Test the benchmark_renderers command."""
+
+    def test_benchmark_renderers(self):
+        """Test a timing line is written for each format."""
+        out = StringIO()
+
+        call_command('benchmark_renderers', recipes=10, repeat=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('json:', output)
+        self.assertIn('orjson:', output)
+
+
+class BenchmarkHashersCommandTest(SimpleTestCase):
+    """Test the benchmark_hashers command."""
+
+    def test_benchmark_hashers(self):
+        """Test a timing line is written for each iteration count."""
+        out = StringIO()
+
+        call_command('benchmark_hashers', iterations='1000,2000', hashes=2,
+                     threads=2, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('1000 iterations:', lines[0])
+        self.assertIn('ms per hash', lines[0])
+
+    def test_invalid_arguments(self):
+        """Test nonsensical arguments are refused."""
+        with self.assertRaises(CommandError):
+            call_command('benchmark_hashers', hashes=0)
+        with self.assertRaises(CommandError):
+            call_command('benchmark_hashers', iterations='many')
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    """Answer every GET with a small JSON body, keeping connections."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"results": []}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LoadTestCommandTest(SimpleTestCase):
+    """Test the load_test command."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), OkHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_load_test(self):
+        """Test a line is written per concurrency level."""
+        out = StringIO()
+        url = f'http://127.0.0.1:{self.server.server_port}/api/'
+
+        call_command('load_test', url, token='abc', requests=10,
+                     concurrency='1,4', stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        for line in lines:
+            self.assertIn('req/s', line)
+            self.assertTrue(line.endswith('0 errors'))
+
+    def test_https_refused(self):
+        """Test only plain http URLs are accepted."""
+        with self.assertRaises(CommandError):
+            call_command('load_test', 'https://example.com/', requests=1,
+                         concurrency='1', stdout=StringIO())
+
+    def test_invalid_arguments(self):
+        """Test nonsensical request counts and concurrencies are refused."""
+        url = f'http://127.0.0.1:{self.server.server_port}/api/'
+        for options in ({'requests': 0}, {'concurrency': '0'},
+                        {'concurrency': 'many'}):
+            with self.subTest(**options):
+                with self.assertRaises(CommandError):
+                    call_command('load_test', url, stdout=StringIO(),
+                                 **options)
+
+
+class ProfilingHeaderCommandTest(SimpleTestCase):
+    """Test the profiling_header command."""
+
+    def test_header_accepted(self):
+        """Test the printed header gets a request profiled."""
+        stdout = StringIO()
+        call_command('profiling_header', stdout=stdout)
 
-        # making sure that pactched_check is called with the default database
-        patched_check.assert_called_with(databases=['default'])
+        name, _, value = stdout.getvalue().strip().partition(': ')
+        request = RequestFactory().get('/', HTTP_X_PROFILE=value)
+        self.assertEqual(name, 'X-Profile')
+        self.assertEqual(get_trigger(request), 'header')
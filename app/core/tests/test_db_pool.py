@@ -0,0 +1,227 @@
+"""
+Tests for the database connection pool.
+"""
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db import pool
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    """Stand-in for a DB-API connection."""
+
+    def __init__(self):
+        self.closed = False
+        self.usable = True
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    """Return a pool of fake connections."""
+    return ConnectionPool(
+        FakeConnection,
+        is_usable=lambda conn: conn.usable,
+        reset=lambda conn: not conn.closed,
+        **kwargs,
+    )
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test checking connections in and out of the pool."""
+
+    def test_reuse(self):
+        """Test a returned connection is handed out again."""
+        connections = make_pool(size=2)
+        conn = connections.checkout()
+        connections.checkin(conn)
+
+        self.assertIs(connections.checkout(), conn)
+        stats = connections.stats()
+        self.assertEqual(stats['connects'], 1)
+        self.assertEqual(stats['reuses'], 1)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_overflow_closed_on_return(self):
+        """Test connections past the pool size aren't kept."""
+        connections = make_pool(size=1, max_overflow=1)
+        first, second = connections.checkout(), connections.checkout()
+        connections.checkin(first)
+        connections.checkin(second)
+
+        self.assertFalse(first.closed)
+        self.assertTrue(second.closed)
+        stats = connections.stats()
+        self.assertEqual(stats['idle'], 1)
+        self.assertEqual(stats['peak_in_use'], 2)
+
+    def test_timeout(self):
+        """Test waiting for a connection gives up after the timeout."""
+        connections = make_pool(size=1, max_overflow=0, timeout=0.01)
+        connections.checkout()
+
+        with self.assertRaises(PoolTimeout):
+            connections.checkout()
+        self.assertEqual(connections.stats()['timeouts'], 1)
+
+    def test_wait_for_return(self):
+        """Test a waiting caller gets the next returned connection."""
+        connections = make_pool(size=1, max_overflow=0, timeout=5)
+        conn = connections.checkout()
+        threading.Timer(0.05, connections.checkin, [conn]).start()
+
+        self.assertIs(connections.checkout(), conn)
+        self.assertGreaterEqual(connections.stats()['waits'], 1)
+
+    def test_health_check(self):
+        """Test idle connections failing the check are replaced."""
+        connections = make_pool(health_check_after=0)
+        conn = connections.checkout()
+        connections.checkin(conn)
+        conn.usable = False
+
+        self.assertIsNot(connections.checkout(), conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(connections.stats()['health_check_failures'], 1)
+
+    def test_health_check_unlocked(self):
+        """Test a slow health check doesn't hold up other callers."""
+        checking, release = threading.Event(), threading.Event()
+
+        def is_usable(conn):
+            checking.set()
+            release.wait(5)
+            return True
+
+        connections = ConnectionPool(FakeConnection, is_usable=is_usable,
+                                     reset=lambda conn: True,
+                                     health_check_after=0)
+        connections.checkin(connections.checkout())
+        checker = threading.Thread(target=connections.checkout)
+        checker.start()
+        self.assertTrue(checking.wait(5))
+
+        # Another caller gets a new connection while the check runs
+        other = threading.Thread(target=connections.checkout)
+        other.start()
+        other.join(1)
+        self.assertFalse(other.is_alive())
+
+        release.set()
+        checker.join()
+        self.assertEqual(connections.stats()['in_use'], 2)
+
+    def test_recycle_idle(self):
+        """Test connections idle for too long are closed."""
+        connections = make_pool(idle_timeout=10)
+        conn = connections.checkout()
+        connections.checkin(conn)
+
+        with patch('core.db.pool.time.monotonic',
+                   return_value=pool.time.monotonic() + 60):
+            self.assertIsNot(connections.checkout(), conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(connections.stats()['recycled'], 1)
+
+    def test_broken_connection_discarded(self):
+        """Test a connection failing to reset isn't kept."""
+        connections = make_pool()
+        conn = connections.checkout()
+        conn.closed = True
+        connections.checkin(conn)
+
+        stats = connections.stats()
+        self.assertEqual(stats['idle'], 0)
+        self.assertEqual(stats['discarded'], 1)
+
+    def test_connect_failure_frees_slot(self):
+        """Test a failed connect doesn't use up the pool."""
+        connections = make_pool(size=1, max_overflow=0, timeout=0)
+        with patch.object(connections, 'connect', side_effect=OSError):
+            with self.assertRaises(OSError):
+                connections.checkout()
+
+        self.assertIsInstance(connections.checkout(), FakeConnection)
+
+
+class PooledBackendTests(TestCase):
+    """Test the backend takes its connections from the pool."""
+
+    def test_connection_reused(self):
+        """Test closing and reconnecting reuses the raw connection."""
+        wrapper = connection.copy()
+        try:
+            wrapper.ensure_connection()
+            raw = wrapper.connection
+            wrapper.close()
+            wrapper.ensure_connection()
+
+            self.assertIs(wrapper.connection, raw)
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                self.assertEqual(cursor.fetchone(), (1,))
+        finally:
+            wrapper.close()
+
+    def test_open_transaction_rolled_back(self):
+        """Test a connection comes back from the pool with no transaction."""
+        wrapper = connection.copy()
+        try:
+            wrapper.ensure_connection()
+            wrapper.connection.autocommit = False
+            with wrapper.connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            wrapper.close()
+            wrapper.ensure_connection()
+
+            self.assertEqual(wrapper.connection.get_transaction_status(), 0)
+        finally:
+            wrapper.close()
+
+    def test_session_reset(self):
+        """Test session settings don't leak to the next checkout."""
+        wrapper = connection.copy()
+        try:
+            wrapper.ensure_connection()
+            raw = wrapper.connection
+            with raw.cursor() as cursor:
+                cursor.execute("SET statement_timeout = '1234ms'")
+            wrapper.close()
+            wrapper.ensure_connection()
+
+            self.assertIs(wrapper.connection, raw)
+            with wrapper.cursor() as cursor:
+                cursor.execute('SHOW statement_timeout')
+                self.assertEqual(cursor.fetchone(), ('0',))
+        finally:
+            wrapper.close()
+
+    def test_stats_endpoint(self):
+        """Test staff users can read the pool stats."""
+        client = APIClient()
+        user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        client.force_authenticate(user)
+        self.assertEqual(client.get(reverse('db-pool')).status_code,
+                         status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        res = client.get(reverse('db-pool'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        databases = {stats['database'] for stats in res.data}
+        self.assertIn(connection.settings_dict['NAME'], databases)
+        self.assertIn('in_use', res.data[0])
@@ -0,0 +1,109 @@
+"""
+Tests for the password hasher profile.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (
+    check_password,
+    identify_hasher,
+    make_password,
+)
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.hashing import HashingBusy, hashing_slot
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class HasherTests(SimpleTestCase):
+    """Test the PBKDF2 hasher follows PASSWORD_PBKDF2_ITERATIONS."""
+
+    def test_iterations(self):
+        """Test hashes use the configured iteration count."""
+        encoded = make_password('secret-pass')
+
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(check_password('secret-pass', encoded))
+        self.assertFalse(check_password('wrong-pass', encoded))
+
+    def test_must_update(self):
+        """Test hashes made with another work factor need an update."""
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=500):
+            encoded = make_password('secret-pass')
+
+        self.assertTrue(identify_hasher(encoded).must_update(encoded))
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class UserHashingTests(TestCase):
+    """Test users' hashes follow the work factor."""
+
+    def test_hash_upgraded_on_check(self):
+        """Test a password hashed with old settings is hashed again."""
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=500):
+            user = get_user_model().objects.create_user(
+                'user@example.com',
+                'secret-pass',
+            )
+
+        self.assertTrue(user.check_password('secret-pass'))
+
+        user.refresh_from_db()
+        self.assertEqual(identify_hasher(user.password).safe_summary(
+            user.password)['iterations'], 1000)
+
+
+@override_settings(
+    PASSWORD_PBKDF2_ITERATIONS=1000,
+    PASSWORD_HASHING_CONCURRENCY=1,
+    PASSWORD_HASHING_TIMEOUT=0.01,
+    PASSWORD_HASHING_RETRY_AFTER=3,
+)
+class HashingSlotTests(TestCase):
+    """Test how many passwords are hashed at once is bounded."""
+
+    def setUp(self):
+        get_user_model().objects.create_user(
+            'user@example.com',
+            'secret-pass',
+        )
+        self.client = APIClient()
+
+    def test_slot_released(self):
+        """Test a slot is given back after the block."""
+        with hashing_slot():
+            pass
+        with hashing_slot():
+            with self.assertRaises(HashingBusy):
+                with hashing_slot():
+                    pass
+
+    def test_signup_busy(self):
+        """Test signing up without a free slot is a 429."""
+        with hashing_slot():
+            res = self.client.post(reverse('user:create'), {
+                'email': 'new@example.com',
+                'password': 'secret-pass',
+                'name': 'New',
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '3')
+        self.assertFalse(
+            get_user_model().objects.filter(email='new@example.com').exists()
+        )
+
+    def test_token_busy(self):
+        """Test logging in without a free slot is a 429."""
+        payload = {'email': 'user@example.com', 'password': 'secret-pass'}
+        with hashing_slot():
+            res = self.client.post(reverse('user:token'), payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '3')
+
+        res = self.client.post(reverse('user:token'), payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
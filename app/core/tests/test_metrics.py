@@ -0,0 +1,121 @@
+"""
+Tests for the request metrics.
+"""
+import math
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.metrics import Histogram
+from user.serializers import UserSerializer
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class HistogramTests(SimpleTestCase):
+    """Test the histogram buckets and quantiles."""
+
+    def test_observe(self):
+        """Test values land in the first bucket at least as large."""
+        histogram = Histogram((1, 5, math.inf))
+        for value in (0.5, 1, 3, 100):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.sum, 104.5)
+
+    def test_quantile(self):
+        """Test quantiles are read from the bucket bounds."""
+        histogram = Histogram((1, 5, 10, math.inf))
+        for value in [1] * 90 + [7] * 10:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.quantile(0.5), 1)
+        self.assertEqual(histogram.quantile(0.95), 10)
+        self.assertIsNone(Histogram((1,)).quantile(0.5))
+
+
+class RequestMetricsTests(TestCase):
+    """Test requests are measured per endpoint."""
+
+    def setUp(self):
+        metrics.reset()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        metrics.reset()
+
+    def test_request_measured(self):
+        """Test the queries and times of a request are recorded."""
+        res = self.client.get(RECIPES_URL)
+
+        request_metrics = res.request_metrics
+        self.assertEqual(request_metrics.endpoint, 'recipe:recipe-list')
+        self.assertGreater(request_metrics.queries, 0)
+        self.assertGreater(request_metrics.db_time, 0)
+        self.assertGreater(request_metrics.serialization_time, 0)
+        self.assertGreater(request_metrics.render_time, 0)
+        self.assertGreaterEqual(request_metrics.total_time,
+                                request_metrics.db_time)
+
+        stats = metrics.snapshot()['recipe:recipe-list']
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['queries']['sum'], request_metrics.queries)
+
+    def test_serialization_measured(self):
+        """Test building the response data is timed apart."""
+        with patch.object(UserSerializer, 'to_representation',
+                          side_effect=lambda user: time.sleep(0.05) or {}):
+            res = self.client.get(reverse('user:me'))
+
+        request_metrics = res.request_metrics
+        self.assertGreaterEqual(request_metrics.serialization_time, 0.05)
+        self.assertLess(request_metrics.render_time, 0.05)
+        stats = metrics.snapshot()['user:me']
+        self.assertEqual(stats['serialization_ms']['count'], 1)
+        self.assertGreaterEqual(stats['serialization_ms']['sum'], 50)
+
+    def test_unresolved(self):
+        """Test requests to unknown URLs are grouped together."""
+        self.client.get('/no-such-page/')
+
+        self.assertEqual(metrics.snapshot()['<unresolved>']['requests'], 1)
+
+    @override_settings(QUERY_BUDGETS={'recipe:recipe-list': 0})
+    def test_over_budget_counted(self):
+        """Test requests over their query budget are counted."""
+        self.client.get(RECIPES_URL)
+
+        stats = metrics.snapshot()['recipe:recipe-list']
+        self.assertEqual(stats['query_budget'], 0)
+        self.assertEqual(stats['over_budget'], 1)
+
+    def test_metrics_endpoint(self):
+        """Test staff users can read the metrics."""
+        self.assertEqual(self.client.get(reverse('metrics')).status_code,
+                         status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(RECIPES_URL)
+        res = self.client.get(reverse('metrics'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('recipe:recipe-list', res.data)
+        self.assertEqual(
+            res.data['recipe:recipe-list']['total_ms']['buckets']['+Inf'],
+            0,
+        )
@@ -0,0 +1,197 @@
+"""
+Tests for the compression middleware.
+"""
+import gzip
+import json
+from unittest import skipUnless
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import middleware
+from core.middleware import CompressionMiddleware, choose_encoding
+
+BODY = json.dumps([{'title': f'Recipe {n}'} for n in range(200)]).encode()
+
+
+def make_response(content=BODY, content_type='application/json', etag=None):
+    """Return a view function returning the given response."""
+    def get_response(request):
+        response = HttpResponse(content, content_type=content_type)
+        if etag:
+            response['ETag'] = etag
+        return response
+    return get_response
+
+
+class ChooseEncodingTests(SimpleTestCase):
+    """Test Accept-Encoding negotiation."""
+
+    @patch.dict(middleware.COMPRESSORS, {
+        'br': middleware.compress_br,
+        'zstd': middleware.compress_zstd,
+    })
+    def test_server_preference(self):
+        """Test the server's preferred encoding wins among accepted."""
+        self.assertEqual(choose_encoding('gzip, deflate, br, zstd'), 'br')
+        self.assertEqual(choose_encoding('gzip, deflate'), 'gzip')
+
+    def test_q_values(self):
+        """Test q=0 refuses an encoding and * accepts the others."""
+        self.assertEqual(choose_encoding('br;q=0, zstd;q=0, *'), 'gzip')
+        self.assertIsNone(choose_encoding('gzip;q=0'))
+        self.assertIsNone(choose_encoding('identity'))
+        self.assertIsNone(choose_encoding(''))
+
+    @patch.dict(middleware.COMPRESSORS, clear=True,
+                values={'gzip': middleware.compress_gzip})
+    def test_missing_library(self):
+        """Test encodings without their library are never chosen."""
+        self.assertEqual(choose_encoding('br, gzip'), 'gzip')
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test responses are compressed when worth it."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        cache.clear()
+
+    def call(self, get_response, accept_encoding='gzip'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(get_response)(request)
+
+    def test_gzip(self):
+        """Test a large JSON response is gzipped."""
+        response = self.call(make_response())
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    @skipUnless(middleware.brotli, 'brotli is not installed.')
+    def test_brotli(self):
+        """Test brotli is used when accepted."""
+        response = self.call(make_response(), 'gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(middleware.brotli.decompress(response.content), BODY)
+
+    @skipUnless(middleware.zstandard, 'zstandard is not installed.')
+    def test_zstd(self):
+        """Test zstd is used when accepted."""
+        response = self.call(make_response(), 'zstd')
+
+        self.assertEqual(response['Content-Encoding'], 'zstd')
+        self.assertEqual(
+            middleware.zstandard.ZstdDecompressor().decompress(
+                response.content,
+            ),
+            BODY,
+        )
+
+    def test_skipped(self):
+        """Test responses that are not worth compressing are left alone."""
+        responses = {
+            'small': make_response(b'{}'),
+            'html': make_response(BODY, 'text/html'),
+            'not accepted': make_response(),
+        }
+        for name, get_response in responses.items():
+            with self.subTest(name):
+                accept = 'identity' if name == 'not accepted' else 'gzip'
+                response = self.call(get_response, accept)
+
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(response.content,
+                                 get_response(None).content)
+
+    def test_async(self):
+        """Test the middleware wraps async handlers without a thread."""
+        get_response = make_response()
+
+        async def async_get_response(request):
+            return get_response(request)
+
+        compression = CompressionMiddleware(async_get_response)
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = async_to_sync(compression)(request)
+
+        self.assertTrue(iscoroutinefunction(compression))
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_streaming_skipped(self):
+        """Test streaming responses are left alone."""
+        response = self.call(
+            lambda request: StreamingHttpResponse(iter([BODY])),
+        )
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_weak_etag(self):
+        """Test the ETag of a compressed response is made weak."""
+        response = self.call(make_response(etag='"abc"'))
+
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+    def test_compressed_body_cached(self):
+        """Test a response with a strong ETag is compressed once."""
+        get_response = make_response(etag='"abc"')
+        with patch.dict(middleware.COMPRESSORS, {'gzip': wraps_counter()}):
+            first = self.call(get_response)
+            second = self.call(get_response)
+            calls = middleware.COMPRESSORS['gzip'].calls
+
+        self.assertEqual(calls, 1)
+        self.assertEqual(first.content, second.content)
+
+    def test_no_etag_not_cached(self):
+        """Test responses without a strong ETag are not cached."""
+        with patch.dict(middleware.COMPRESSORS, {'gzip': wraps_counter()}):
+            self.call(make_response(etag='W/"abc"'))
+            self.call(make_response())
+            calls = middleware.COMPRESSORS['gzip'].calls
+
+        self.assertEqual(calls, 2)
+
+
+def wraps_counter():
+    """Return compress_gzip, counting its calls."""
+    def compress(content):
+        compress.calls += 1
+        return middleware.compress_gzip(content)
+    compress.calls = 0
+    return compress
+
+
+class CompressedApiTests(TestCase):
+    """Test API responses go through the middleware."""
+
+    def test_recipe_list_compressed(self):
+        """Test a large recipe list is sent gzipped."""
+        user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        for n in range(30):
+            user.recipe_set.create(title=f'Recipe {n}', time_minutes=5,
+                                   price='1.00')
+
+        res = client.get(reverse('recipe:recipe-list'),
+                         HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(res.content))
+        self.assertEqual(len(data['results']), 30)
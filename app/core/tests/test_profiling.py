@@ -0,0 +1,109 @@
+"""
+Tests for the request profiler.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import RequestProfile
+from core.profiling import make_header_value
+from recipe.tests.test_recipe_api import create_recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """Test which requests are profiled and what is stored."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        create_recipe(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_signed_header(self):
+        """Test a request with a signed header is profiled."""
+        res = self.client.get(RECIPES_URL,
+                              HTTP_X_PROFILE=make_header_value())
+
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.trigger, RequestProfile.TRIGGER_HEADER)
+        self.assertEqual(profile.endpoint, 'recipe:recipe-list')
+        self.assertEqual(profile.status_code, 200)
+        self.assertEqual(profile.user, self.user)
+        self.assertTrue(profile.hot_functions)
+        self.assertIn('function', profile.hot_functions[0])
+        # The timeline has every query of the request, not the save
+        self.assertEqual(len(profile.sql_timeline), profile.query_count)
+        self.assertEqual(profile.query_count, res.request_metrics.queries)
+        self.assertIn('core_recipe', ' '.join(
+            query['sql'] for query in profile.sql_timeline
+        ))
+
+    def test_streaming_saved_once_sent(self):
+        """Test a streamed response is profiled once its body is sent."""
+        res = self.client.get(reverse('recipe:recipe-export'),
+                              HTTP_X_PROFILE=make_header_value())
+        self.assertFalse(RequestProfile.objects.exists())
+
+        b''.join(res.streaming_content)
+
+        self.assertEqual(RequestProfile.objects.get().endpoint,
+                         'recipe:recipe-export')
+
+    def test_bad_signature(self):
+        """Test a forged header doesn't get the request profiled."""
+        self.client.get(RECIPES_URL, HTTP_X_PROFILE='profile:forged:sig')
+
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILING_SIGNATURE_MAX_AGE=-1)
+    def test_expired_signature(self):
+        """Test an expired header doesn't get the request profiled."""
+        self.client.get(RECIPES_URL, HTTP_X_PROFILE=make_header_value())
+
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampling(self):
+        """Test requests are profiled at the sampling rate."""
+        self.client.get(RECIPES_URL)
+
+        self.assertEqual(RequestProfile.objects.get().trigger,
+                         RequestProfile.TRIGGER_SAMPLE)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_KEEP=2)
+    def test_oldest_dropped(self):
+        """Test only the most recent profiles are kept."""
+        for _ in range(4):
+            self.client.get(RECIPES_URL)
+
+        self.assertEqual(RequestProfile.objects.count(), 2)
+
+    def test_admin(self):
+        """Test profiles are listed and shown in the admin."""
+        self.client.get(RECIPES_URL, HTTP_X_PROFILE=make_header_value())
+        profile = RequestProfile.objects.get()
+        admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        self.client.force_login(admin_user)
+
+        res = self.client.get(
+            reverse('admin:core_requestprofile_changelist'),
+        )
+        self.assertContains(res, 'recipe:recipe-list')
+
+        res = self.client.get(
+            reverse('admin:core_requestprofile_change', args=[profile.id]),
+        )
+        self.assertContains(res, 'Hot functions')
+        self.assertContains(res, 'core_recipe')
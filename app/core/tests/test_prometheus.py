@@ -0,0 +1,165 @@
+"""
+Tests for the Prometheus metrics.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import prometheus
+
+try:
+    from prometheus_client import REGISTRY
+except ImportError:  # pragma: no cover
+    REGISTRY = None
+
+RECIPES_URL = reverse('recipe:recipe-list')
+METRICS_URL = reverse('prometheus-metrics')
+APP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+
+def sample(name, **labels):
+    """Return the current value of a metric sample, 0 if absent."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@skipUnless(prometheus.prometheus_client, 'prometheus_client not installed')
+class PrometheusMetricsTests(TestCase):
+    """Test what is collected and served at /metrics."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+
+    def test_requests_counted(self):
+        """Test requests are counted and timed per endpoint."""
+        labels = {'endpoint': 'recipe:recipe-list'}
+        requests = sample('http_requests_total', method='GET',
+                          status='200', **labels)
+        timed = sample('http_request_duration_seconds_count', **labels)
+
+        self.client.force_authenticate(self.user)
+        self.client.get(RECIPES_URL)
+
+        self.assertEqual(sample('http_requests_total', method='GET',
+                                status='200', **labels), requests + 1)
+        self.assertEqual(
+            sample('http_request_duration_seconds_count', **labels),
+            timed + 1,
+        )
+        self.assertGreater(sample('http_request_db_queries_sum', **labels),
+                           0)
+
+    def test_metrics_endpoint(self):
+        """Test /metrics serves the text format."""
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'http_requests_total{', res.content)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_token(self):
+        """Test /metrics requires the bearer token when one is set."""
+        self.assertEqual(self.client.get(METRICS_URL).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+
+        res = self.client.get(
+            METRICS_URL,
+            HTTP_AUTHORIZATION='Bearer scrape-secret',
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # The token is required from allowed addresses too
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='127.0.0.1')
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_metrics_closed_by_default(self):
+        """Test /metrics without a token is only open to allowed IPs."""
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        with override_settings(METRICS_ALLOWED_IPS=['203.0.113.7']):
+            res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_auth_failures(self):
+        """Test bad tokens and failed logins are counted."""
+        tokens = sample('auth_failures_total', kind='token')
+        logins = sample('auth_failures_total', kind='login')
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token not-a-token')
+        self.client.get(RECIPES_URL)
+        self.client.credentials()
+        self.client.post(reverse('user:token'), {
+            'email': 'user@example.com',
+            'password': 'wrong-pass',
+        })
+
+        self.assertEqual(sample('auth_failures_total', kind='token'),
+                         tokens + 1)
+        self.assertEqual(sample('auth_failures_total', kind='login'),
+                         logins + 1)
+
+    def test_cache_hits(self):
+        """Test response cache hits and misses are counted."""
+        labels = {'cache': 'recipe_response'}
+        hits = sample('cache_requests_total', result='hit', **labels)
+        misses = sample('cache_requests_total', result='miss', **labels)
+
+        self.client.force_authenticate(self.user)
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL)
+
+        self.assertEqual(
+            sample('cache_requests_total', result='miss', **labels),
+            misses + 1,
+        )
+        self.assertEqual(
+            sample('cache_requests_total', result='hit', **labels),
+            hits + 1,
+        )
+
+    def test_pool_stats(self):
+        """Test the connection pool usage is exported."""
+        prometheus._pool_poller.refresh()
+
+        self.assertIsNotNone(REGISTRY.get_sample_value(
+            'db_pool_connections',
+            {'alias': 'default', 'state': 'in_use'},
+        ))
+
+    def test_multiprocess(self):
+        """Test /metrics adds up the values of every worker process."""
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': directory}
+            for _ in range(2):
+                subprocess.run(
+                    [sys.executable, '-c', 'from core import prometheus; '
+                                           'prometheus.auth_failure("token")'],
+                    cwd=APP_DIR,
+                    env=env,
+                    check=True,
+                )
+
+            with patch.dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory):
+                body, _ = prometheus.generate_latest()
+
+        self.assertIn(b'auth_failures_total{kind="token"} 2.0', body)
@@ -0,0 +1,123 @@
+"""
+Tests for the orjson renderer and parser.
+"""
+import io
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import MessagePackParser, ORJSONParser
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+
+SAMPLE = {
+    'results': [
+        {'id': 1, 'title': 'Crêpes', 'price': '5.25', 'link': ''},
+        {'id': 2, 'title': 'Line\u2028separator', 'price': None},
+    ],
+    'decimal': Decimal('1.50'),
+    'lazy': gettext_lazy('Not found.'),
+    'errors': {0: [ErrorDetail('Not found.', code='not_found')]},
+}
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Test ORJSONRenderer writes what JSONRenderer writes."""
+
+    def test_render_same_as_json_renderer(self):
+        """Test the output matches the stdlib renderer."""
+        expected = JSONRenderer().render(SAMPLE, 'application/json')
+
+        self.assertEqual(
+            ORJSONRenderer().render(SAMPLE, 'application/json'),
+            expected,
+        )
+
+    def test_render_none(self):
+        """Test no data renders an empty body."""
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_render_indent(self):
+        """Test an indent request is honoured."""
+        ret = ORJSONRenderer().render(
+            {'id': 1},
+            'application/json; indent=4',
+        )
+
+        self.assertEqual(ret, b'{\n    "id": 1\n}')
+
+    @patch('core.renderers.orjson', None)
+    def test_render_without_orjson(self):
+        """Test the stdlib renderer is used when orjson is missing."""
+        ret = ORJSONRenderer().render({'id': 1}, 'application/json')
+
+        self.assertEqual(ret, b'{"id":1}')
+
+
+class ORJSONParserTests(SimpleTestCase):
+    """Test ORJSONParser reads JSON bodies."""
+
+    def parse(self, body, **context):
+        return ORJSONParser().parse(io.BytesIO(body), parser_context=context)
+
+    def test_parse(self):
+        """Test a JSON body is parsed."""
+        self.assertEqual(
+            self.parse('{"title": "Crêpes", "ids": [1, 2]}'.encode()),
+            {'title': 'Crêpes', 'ids': [1, 2]},
+        )
+
+    def test_parse_other_encoding(self):
+        """Test a body in another charset is decoded first."""
+        body = '{"title": "Crêpes"}'.encode('latin-1')
+
+        self.assertEqual(
+            self.parse(body, encoding='latin-1'),
+            {'title': 'Crêpes'},
+        )
+
+    def test_parse_invalid(self):
+        """Test invalid JSON raises a parse error."""
+        for body in (b'{"title": ', b'{"price": NaN}'):
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError):
+                    self.parse(body)
+
+    @patch('core.parsers.orjson', None)
+    def test_parse_without_orjson(self):
+        """Test the stdlib parser is used when orjson is missing."""
+        self.assertEqual(self.parse(b'{"id": 1}'), {'id': 1})
+
+
+class MessagePackTests(SimpleTestCase):
+    """Test the MessagePack renderer and parser."""
+
+    def test_round_trip(self):
+        """Test rendered data parses back to its JSON equivalent."""
+        # Integer keys stay integers in MessagePack, and request
+        # bodies may only use string keys.
+        sample = {k: v for k, v in SAMPLE.items() if k != 'errors'}
+        body = MessagePackRenderer().render(sample)
+
+        data = MessagePackParser().parse(io.BytesIO(body))
+
+        self.assertEqual(data['results'], SAMPLE['results'])
+        self.assertEqual(data['decimal'], 1.5)
+        self.assertEqual(data['lazy'], 'Not found.')
+
+    def test_render_smaller_than_json(self):
+        """Test MessagePack bodies are smaller than JSON ones."""
+        self.assertLess(
+            len(MessagePackRenderer().render(SAMPLE)),
+            len(ORJSONRenderer().render(SAMPLE)),
+        )
+
+    def test_parse_invalid(self):
+        """Test a truncated body raises a parse error."""
+        body = MessagePackRenderer().render(SAMPLE)[:-3]
+
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(io.BytesIO(body))
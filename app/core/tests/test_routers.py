@@ -0,0 +1,136 @@
+"""
+Tests for the read replica router.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import routers
+from core.models import Recipe
+from recipe.tests.test_recipe_api import create_recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+ME_URL = reverse('user:me')
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Test where the router sends queries."""
+
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+
+    def test_reads_on_primary_by_default(self):
+        """Test reads go to the primary outside opted in views."""
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_opted_in_reads_on_replica(self):
+        """Test reads go to a replica once opted in."""
+        token = routers._use_replicas.set('replica_0')
+        try:
+            self.assertEqual(self.router.db_for_read(Recipe), 'replica_0')
+            self.assertEqual(self.router.db_for_write(Recipe), 'default')
+        finally:
+            routers._use_replicas.reset(token)
+
+    def test_no_migrations_on_replicas(self):
+        """Test replicas are never migrated."""
+        self.assertFalse(self.router.allow_migrate('replica_0', 'core'))
+        self.assertTrue(self.router.allow_migrate('default', 'core'))
+
+
+# No replica is configured in tests: the chosen "replica" is the
+# primary, the tests check whether one gets chosen at all.
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+@patch('core.routers.choose_replica', return_value='default')
+class ReplicaReadMixinTests(TestCase):
+    """Test which requests read from a replica."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_get_reads_from_replica(self, choose_replica):
+        """Test listing recipes reads from a replica."""
+        self.client.get(RECIPES_URL)
+
+        choose_replica.assert_called()
+
+    @override_settings(DATABASE_REPLICAS=['replica_0', 'replica_1'])
+    def test_one_replica_per_request(self, choose_replica):
+        """Test every read of a request goes to the same replica."""
+        aliases = []
+        db_for_read = routers.ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            aliases.append(db_for_read(router, model, **hints))
+            return aliases[-1]
+
+        create_recipe(user=self.user)
+        # Unpin the user
+        cache.clear()
+        with patch.object(routers.ReplicaRouter, 'db_for_read', record):
+            # The validators, then the page of rows
+            self.client.get(RECIPES_URL)
+
+        choose_replica.assert_called_once()
+        self.assertGreater(len(aliases), 1)
+        self.assertEqual(set(aliases), {'default'})
+
+    def test_read_your_writes(self, choose_replica):
+        """Test reads stay on the primary right after a write."""
+        res = self.client.post(RECIPES_URL, {
+            'title': 'Sample recipe',
+            'time_minutes': 5,
+            'price': '2.50',
+        })
+        self.client.get(reverse('recipe:recipe-detail',
+                                args=[res.data['id']]))
+
+        self.assertTrue(routers.is_pinned(self.user))
+        choose_replica.assert_not_called()
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_pin_expires(self, choose_replica):
+        """Test reads go back to replicas once the window is over."""
+        self.client.patch(ME_URL, {'name': 'New Name'})
+        self.assertFalse(routers.is_pinned(self.user))
+
+        self.client.get(RECIPES_URL)
+
+        choose_replica.assert_called()
+
+    def test_profile_update_pins(self, choose_replica):
+        """Test updating the profile pins the user to the primary."""
+        self.client.patch(ME_URL, {'name': 'New Name'})
+
+        self.assertTrue(routers.is_pinned(self.user))
+
+    def test_changes_outside_views_pin(self, choose_replica):
+        """Test recipe changes made outside the API pin the owner."""
+        recipe = Recipe.objects.create(user=self.user, title='Soup',
+                                       time_minutes=5, price='2.50')
+        cache.clear()
+        # e.g. a bulk edit in the admin or import_recipes
+        Recipe.objects.filter(id=recipe.id).update(title='Stew')
+
+        self.client.get(RECIPES_URL)
+
+        self.assertTrue(routers.is_pinned(self.user))
+        choose_replica.assert_not_called()
+
+    def test_sync_reads_from_primary(self, choose_replica):
+        """Test delta sync never reads from a replica."""
+        self.client.get(reverse('recipe:recipe-changes'))
+
+        choose_replica.assert_not_called()
@@ -0,0 +1,56 @@
+"""
+Views for operational endpoints.
+"""
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import metrics, prometheus
+from core.db.pool import get_pool_stats
+from user.authentication import CachedTokenAuthentication
+
+
+class DatabasePoolStatsView(APIView):
+    """Return the usage of this process' database connection pools."""
+    # Staff only, with a token or logged in to the admin
+    authentication_classes = [CachedTokenAuthentication,
+                              SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_pool_stats())
+
+
+class RequestMetricsView(APIView):
+    """Return the request metrics of this process, per endpoint."""
+    authentication_classes = [CachedTokenAuthentication,
+                              SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.snapshot())
+
+
+def prometheus_metrics(request):
+    """Return the metrics of every worker in Prometheus' text format."""
+    # A plain Django view: no content negotiation or DRF auth on the
+    # scrape path. Protected by a bearer token when METRICS_TOKEN is set,
+    # open to METRICS_ALLOWED_IPS only otherwise.
+    if settings.METRICS_TOKEN:
+        if not constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''),
+            f'Bearer {settings.METRICS_TOKEN}',
+        ):
+            return HttpResponse(status=401)
+    elif request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponse(status=403)
+    latest = prometheus.generate_latest()
+    if latest is None:
+        return HttpResponse('prometheus_client is not installed.\n',
+                            status=501, content_type='text/plain')
+    body, content_type = latest
+    return HttpResponse(body, content_type=content_type)
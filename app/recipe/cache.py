@@ -0,0 +1,125 @@
+"""
+Per-user response cache for the recipe API.
+
+Every user has a generation number stored in the cache. Cached
+responses include the generation in their key, so bumping it after a
+change to any of the user's recipes makes all of them unreachable at
+once (they then expire on their own).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from core import prometheus
+
+
+def get_cache():
+    """Return the cache used for recipe responses."""
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def _generation_key(user_id):
+    return f'recipe-gen:{user_id}'
+
+
+def _new_generation():
+    # Start from the current time instead of 0, so a generation that got
+    # evicted from the cache never comes back with an old value.
+    return time.time_ns()
+
+
+def get_generation(user_id):
+    """Return the current cache generation for the user."""
+    cache = get_cache()
+    key = _generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _new_generation(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump_generations(user_ids):
+    cache = get_cache()
+    for user_id in user_ids:
+        key = _generation_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Nothing cached for this user yet
+            cache.add(key, _new_generation(), None)
+
+
+def bump_generations(user_ids):
+    """Invalidate the cached responses of the given users."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    _bump_generations(user_ids)
+    # A request may read the old rows between the bump and the commit
+    # and cache them under the new generation, so bump again once the
+    # change is visible to everybody.
+    transaction.on_commit(lambda: _bump_generations(user_ids))
+
+
+def get_or_set_for_user(user_id, name, default):
+    """
+    Return the value cached under name for the user's current
+    generation, computing it with default() on a miss. None results
+    are not cached.
+    """
+    cache = get_cache()
+    key = f'recipe-data:{user_id}:{get_generation(user_id)}:{name}'
+    value = cache.get(key)
+    if value is None:
+        value = default()
+        if value is not None:
+            cache.set(key, value, settings.RECIPE_CACHE_TIMEOUT)
+    return value
+
+
+def make_response_key(request, generation):
+    """Return the cache key for a request of the current user."""
+    # Query params are sorted so ?a=1&b=2 and ?b=2&a=1 share an entry.
+    # The host is part of the key because paginated responses contain
+    # absolute next/previous links.
+    params = sorted(request.query_params.lists())
+    raw = f'{request.get_host()}|{request.path}|{params}'
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'recipe-resp:{request.user.pk}:{generation}:{digest}'
+
+
+class ResponseCacheMixin:
+    """
+    Cache the list and retrieve responses of a viewset per user.
+    Hits return the stored data without touching the db or serializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Return the cached response, or call handler and cache it."""
+        cache = get_cache()
+        generation = get_generation(request.user.pk)
+        key = make_response_key(request, generation)
+
+        data = cache.get(key)
+        prometheus.cache_lookup('recipe_response', data is not None)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        # Only successful responses are cached, errors are cheap anyway
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RECIPE_CACHE_TIMEOUT)
+        return response
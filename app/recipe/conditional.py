@@ -0,0 +1,121 @@
+"""
+Conditional GET (ETag / Last-Modified) support for the recipe API.
+
+The validators are computed from aggregate queries over the user's
+recipes and tombstones, without building or serializing the response,
+and are cached until the user's recipes change. A client with an up to date
+copy gets a 304 almost for free.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from core.models import Recipe, RecipeTombstone
+from recipe.cache import get_or_set_for_user
+
+
+def make_etag(request, *parts):
+    """Return a strong ETag for the request and validator parts."""
+    # The representation also depends on the path, the query params
+    # (page, page size...) and the negotiated media type.
+    params = sorted(request.query_params.lists())
+    raw = '|'.join(str(part) for part in (
+        request.user.pk,
+        request.get_host(),
+        request.path,
+        params,
+        request.accepted_media_type,
+        *parts,
+    ))
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def get_list_validators(user):
+    """Return what the ETag and Last-Modified of the list depend on."""
+    info = Recipe.objects.filter(user=user).aggregate(
+        last_modified=Max('updated_at'),
+        count=Count('id'),
+        max_id=Max('id'),
+    )
+    # Served by the (user, deleted_at, id) index
+    info['last_deleted'] = RecipeTombstone.objects.filter(
+        user=user,
+    ).aggregate(last_deleted=Max('deleted_at'))['last_deleted']
+    return info
+
+
+class ConditionalGetMixin:
+    """
+    Add ETag/Last-Modified to the list and retrieve responses of a
+    recipe viewset and answer matching conditional requests with 304.
+    """
+
+    def list(self, request, *args, **kwargs):
+        # Any create/update changes max(updated_at) or max(id), a delete
+        # adds a tombstone. The result is cached until the user's
+        # recipes change.
+        info = get_or_set_for_user(
+            request.user.pk,
+            'list-validators',
+            lambda: get_list_validators(request.user),
+        )
+        etag = make_etag(
+            request,
+            info['last_modified'],
+            info['count'],
+            info['max_id'],
+            info['last_deleted'],
+        )
+        # A delete doesn't move max(updated_at), so the list is as
+        # recent as its last change or its last delete.
+        last_modified = max(filter(None, (
+            info['last_modified'],
+            info['last_deleted'],
+        )), default=None)
+        return self.conditional_response(
+            super().list, etag, last_modified,
+            request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        try:
+            last_modified = get_or_set_for_user(
+                request.user.pk,
+                f'detail-validators:{kwargs[lookup]}',
+                Recipe.objects.filter(
+                    user=request.user,
+                    pk=kwargs[lookup],
+                ).values_list('updated_at', flat=True).first,
+            )
+        except (TypeError, ValueError):
+            last_modified = None
+        # Unknown recipes fall through to the normal 404
+        if last_modified is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = make_etag(request, kwargs[lookup], last_modified)
+        return self.conditional_response(
+            super().retrieve, etag, last_modified,
+            request, *args, **kwargs
+        )
+
+    def conditional_response(self, handler, etag, last_modified,
+                             request, *args, **kwargs):
+        """Return a 304 if the client copy is current, else call handler."""
+        timestamp = last_modified and int(last_modified.timestamp())
+        response = get_conditional_response(
+            request._request,
+            etag=etag,
+            last_modified=timestamp,
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        # Both the 304 and the full response carry the validators
+        response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
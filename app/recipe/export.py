@@ -0,0 +1,64 @@
+"""
+Streaming export of a user's recipes.
+
+Rows are read from a server-side cursor in chunks as plain dicts
+(no model instances) and written out one at a time, so memory use
+stays flat whatever the size of the library.
+"""
+import csv
+import json
+from decimal import Decimal
+
+from django.conf import settings
+
+from recipe.serializers import RecipeSerializer
+
+# Same columns as the API
+EXPORT_FIELDS = RecipeSerializer.Meta.fields
+
+# Supported export formats: content type and file extension
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+}
+
+
+def _to_json(value):
+    # Decimals are written as strings, like the API does
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def iter_rows(queryset):
+    """Yield the recipes of queryset as dicts of the exported fields."""
+    return queryset.values(*EXPORT_FIELDS).iterator(
+        chunk_size=settings.RECIPE_EXPORT_CHUNK_SIZE,
+    )
+
+
+def iter_ndjson(queryset):
+    """Yield the recipes of queryset as NDJSON lines."""
+    for row in iter_rows(queryset):
+        yield json.dumps(row, default=_to_json) + '\n'
+
+
+class _Echo:
+    """File-like object that returns what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset):
+    """Yield the recipes of queryset as CSV lines, header first."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in iter_rows(queryset):
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+EXPORTERS = {
+    'ndjson': iter_ndjson,
+    'csv': iter_csv,
+}
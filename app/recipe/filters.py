@@ -0,0 +1,115 @@
+"""
+Filter backends for the recipe API.
+"""
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from recipe.serializers import RecipeFilterSerializer
+
+
+# ?time_minutes_min=, ?time_minutes_max=, ?price_min=, ?price_max=
+# Each range is served by a (user, field, id) index.
+class RecipeRangeFilter(BaseFilterBackend):
+    """Filter recipes by cooking time and price ranges."""
+    lookups = {
+        'time_minutes_min': 'time_minutes__gte',
+        'time_minutes_max': 'time_minutes__lte',
+        'price_min': 'price__gte',
+        'price_max': 'price__lte',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        serializer = RecipeFilterSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return queryset.filter(**{
+            self.lookups[param]: value
+            for param, value in serializer.validated_data.items()
+        })
+
+
+# ?search=... matches words in the title and description with the
+# full-text index, plus titles that are close to the search term
+# (trigram index), so a typo like "spagetti" still finds spaghetti.
+class RecipeSearchFilter(BaseFilterBackend):
+    """Full-text search on recipes, annotated with a relevance rank."""
+    search_param = 'search'
+    # Text search configuration, must match the search_vector trigger
+    search_config = 'english'
+
+    @classmethod
+    def get_search_term(cls, request):
+        """Return the search term of the request, or ''."""
+        return request.query_params.get(cls.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        term = self.get_search_term(request)
+        if not term:
+            return queryset
+
+        query = SearchQuery(
+            term,
+            search_type='websearch',
+            config=self.search_config,
+        )
+        # The rank is a real; cast to double precision it goes through
+        # Python floats and JSON unchanged, so the cursor of a page can
+        # hold the rank and compare equal to it in the next query.
+        return queryset.filter(
+            Q(search_vector=query) | Q(title__trigram_similar=term)
+        ).annotate(
+            search_rank=Cast(
+                SearchRank(F('search_vector'), query)
+                + TrigramSimilarity('title', term),
+                FloatField(),
+            ),
+        )
+
+
+# ?ordering=price, ?ordering=-time_minutes...
+# Every ordering ends with the id so the order is always the same, and
+# matches a (user, field, id) index that PostgreSQL can read forwards
+# or backwards without sorting.
+class RecipeOrderingFilter(BaseFilterBackend):
+    """Order recipes by one of the supported fields."""
+    ordering_param = 'ordering'
+    orderings = {
+        'id': ('id',),
+        '-id': ('-id',),
+        'title': ('title', 'id'),
+        '-title': ('-title', '-id'),
+        'time_minutes': ('time_minutes', 'id'),
+        '-time_minutes': ('-time_minutes', '-id'),
+        'price': ('price', 'id'),
+        '-price': ('-price', '-id'),
+    }
+    default_ordering = ('-id',)
+    # Order of search results when no ordering is given. The cursor
+    # holds both the rank and the id, so equal ranks page correctly.
+    search_ordering = ('-search_rank', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        # Also used by RecipeCursorPagination to order the page and
+        # build its cursors.
+        param = request.query_params.get(self.ordering_param)
+        if param:
+            if param not in self.orderings:
+                raise ValidationError({self.ordering_param: _(
+                    'Choose one of: {orderings}.'
+                ).format(orderings=', '.join(self.orderings))})
+            return self.orderings[param]
+        if RecipeSearchFilter.get_search_term(request):
+            return self.search_ordering
+        return self.default_ordering
+
+    def filter_queryset(self, request, queryset, view):
+        return queryset.order_by(
+            *self.get_ordering(request, queryset, view)
+        )
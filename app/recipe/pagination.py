@@ -0,0 +1,191 @@
+"""
+Pagination classes for the recipe API.
+"""
+import json
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.conf import settings
+from django.core import exceptions as django_exceptions
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Field, Func, Value
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class Row(Func):
+    """A row value, e.g. (title, id), compared column by column."""
+    function = 'ROW'
+    output_field = Field()
+
+
+def _reverse_ordering(ordering):
+    """Return the opposite of an ordering, e.g. ('-id',) for ('id',)."""
+    return tuple(
+        order[1:] if order.startswith('-') else f'-{order}'
+        for order in ordering
+    )
+
+
+# Cursor (keyset) pagination filters on the last seen row instead of
+# using OFFSET, so page 5,000 costs the same as page 1. The cursors
+# returned in next/previous are opaque to the client.
+#
+# DRF's CursorPagination only keys on the first ordering field and
+# skips rows that tie on it with an offset (capped at 1000), so long
+# runs of equal prices or times would loop or drop rows. Here the
+# cursor holds every ordering field, e.g. (time_minutes, id), and the
+# next page is WHERE (time_minutes, id) > (30, 1234). Every ordering
+# ends with the id, so positions are unique and the offset stays 0.
+class RecipeCursorPagination(CursorPagination):
+    """Paginate recipes newest first using an opaque cursor."""
+    # Must match the order used by RecipeViewSet.get_queryset
+    ordering = '-id'
+    page_size = settings.RECIPE_PAGE_SIZE
+    # Lets clients ask for smaller/bigger pages, e.g. ?page_size=20
+    page_size_query_param = 'page_size'
+    # Ceiling for page_size, regardless of what the client asks for
+    max_page_size = settings.RECIPE_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        # A row comparison only matches an ordering whose fields all
+        # go the same way, which is true of RecipeOrderingFilter's.
+        if len({order.startswith('-') for order in self.ordering}) != 1:
+            raise ValidationError(_(
+                'Orderings mixing ascending and descending fields '
+                'cannot be paginated.'
+            ))
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            reverse, current_position = self.cursor[1:]
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            # Test for: (cursor reversed) XOR (queryset reversed)
+            lookup = 'lt' if reverse != self.ordering[0].startswith('-') \
+                else 'gt'
+            queryset = self.filter_after(queryset, current_position, lookup)
+
+        # One more row than the page tells whether there is a next page
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+
+        if reverse:
+            # The page was read backwards, put it back in order
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+        # With an empty page, the links start from the cursor again
+        self.next_position = self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def filter_after(self, queryset, position, lookup):
+        """Return the rows of queryset after (or before) position."""
+        values = self.get_position_values(queryset, position)
+        names = [order.lstrip('-') for order in self.ordering]
+        if len(names) == 1:
+            return queryset.filter(**{f'{names[0]}__{lookup}': values[0]})
+        return queryset.alias(
+            _cursor_row=Row(*(F(name) for name in names)),
+        ).filter(**{f'_cursor_row__{lookup}': Row(*values)})
+
+    def get_position_values(self, queryset, position):
+        """Return the position of a cursor as typed SQL values."""
+        if len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        values = []
+        for order, value in zip(self.ordering, position):
+            name = order.lstrip('-')
+            try:
+                field = queryset.model._meta.get_field(name)
+            except django_exceptions.FieldDoesNotExist:
+                # An annotation, e.g. the search rank
+                field = queryset.query.annotations[name].output_field
+            try:
+                value = field.to_python(value)
+            except django_exceptions.ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            values.append(Value(value, output_field=field))
+        return values
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0,
+            reverse=False,
+            position=self._get_position_from_instance(
+                self.page[-1], self.ordering,
+            ) if self.page else self.next_position,
+        ))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0,
+            reverse=True,
+            position=self._get_position_from_instance(
+                self.page[0], self.ordering,
+            ) if self.page else self.previous_position,
+        ))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+            position = json.loads(tokens['p'][0])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list):
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+    def encode_cursor(self, cursor):
+        tokens = {'p': json.dumps(cursor.position, cls=DjangoJSONEncoder)}
+        if cursor.reverse:
+            tokens['r'] = '1'
+
+        querystring = parse.urlencode(tokens)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded,
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        """Return the values of every ordering field of a row."""
+        names = [order.lstrip('-') for order in ordering]
+        if isinstance(instance, dict):
+            return [instance[name] for name in names]
+        return [getattr(instance, name) for name in names]
@@ -1,14 +1,179 @@
 """Serializers for recipe APIs"""
 
+from django.conf import settings
+from django.utils.functional import cached_property
+from django.utils.translation import gettext as _
 from rest_framework import serializers
-from core.models import Recipe
+from rest_framework.settings import api_settings
+from core.metrics import SerializationTimingMixin
+from core.models import Recipe, RecipeStats
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+# Used when RecipeSerializer is called with many=True. Writes the whole
+# batch with one bulk query instead of one query per recipe.
+class RecipeListSerializer(SerializationTimingMixin,
+                           serializers.ListSerializer):
+    """Serializer for a batch of recipes."""
+
+    def to_internal_value(self, data):
+        # Refuse oversized batches before validating any item
+        if isinstance(data, list) and \
+                len(data) > settings.RECIPE_BULK_MAX_BATCH_SIZE:
+            message = _('Ensure this batch has at most {max} items.')
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [message.format(
+                    max=settings.RECIPE_BULK_MAX_BATCH_SIZE,
+                )],
+            }, code='max_length')
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        """Create and return the recipes with a single INSERT."""
+        recipes = [Recipe(**attrs) for attrs in validated_data]
+        return Recipe.objects.bulk_create(recipes)
+
+    def update(self, instance, validated_data):
+        """Update and return the recipes with a single UPDATE."""
+        # instance is a list of recipes in the same order as the data
+        fields = set()
+        for recipe, attrs in zip(instance, validated_data):
+            for attr, value in attrs.items():
+                setattr(recipe, attr, value)
+            fields.update(attrs)
+        if fields:
+            Recipe.objects.bulk_update(instance, fields)
+        return instance
+
+
+class RecipeSerializer(SerializationTimingMixin,
+                       serializers.ModelSerializer):
     """Serializer for recipe."""
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only output the given field names (?fields= on the API)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         # Setting model
         model = Recipe
         fields = ['id', 'title', 'time_minutes', 'price', 'link']
         read_only_fields = ['id']
+        list_serializer_class = RecipeListSerializer
+
+
+# Fields whose database value is already their representation, so the
+# values path can copy them as they are.
+PLAIN_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+
+
+class ValuesRepresentation:
+    """Build the output of a serializer from QuerySet.values() rows."""
+    # Read-only shortcut for big lists: no model instances and no field
+    # lookups per row. Only plain `source`s (model fields or
+    # annotations) are supported.
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    @cached_property
+    def fields(self):
+        """(name, source, to_representation or None) of each field."""
+        return [
+            (
+                name,
+                field.source,
+                None if isinstance(field, PLAIN_FIELDS)
+                else field.to_representation,
+            )
+            for name, field in self.serializer_class().fields.items()
+            if not field.write_only
+        ]
+
+    @property
+    def field_names(self):
+        """Names of the serialized fields, in output order."""
+        return [name for name, _, _ in self.fields]
+
+    def only(self, field_names):
+        """Return a copy that only outputs the given fields."""
+        restricted = ValuesRepresentation(self.serializer_class)
+        restricted.fields = [
+            field for field in self.fields if field[0] in field_names
+        ]
+        return restricted
+
+    @property
+    def sources(self):
+        """Names to pass to values() to get every serialized field."""
+        return [source for _, source, _ in self.fields]
+
+    def to_representation(self, rows):
+        """Return the serializer output for rows of values()."""
+        fields = self.fields
+        return [
+            {
+                name: (
+                    row[source] if convert is None or row[source] is None
+                    else convert(row[source])
+                )
+                for name, source, convert in fields
+            }
+            for row in rows
+        ]
+
+
+class RecipeBulkDeleteSerializer(serializers.Serializer):
+    """Serializer for the ids of recipes to delete."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.RECIPE_BULK_MAX_BATCH_SIZE,
+    )
+
+
+class RecipeFilterSerializer(serializers.Serializer):
+    """Serializer for the query params that filter the recipe list."""
+    time_minutes_min = serializers.IntegerField(min_value=0, required=False)
+    time_minutes_max = serializers.IntegerField(min_value=0, required=False)
+    price_min = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=0,
+        required=False,
+    )
+    price_max = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=0,
+        required=False,
+    )
+
+
+class RecipeStatsSerializer(SerializationTimingMixin,
+                            serializers.ModelSerializer):
+    """Serializer for the recipe totals of a user."""
+    average_time_minutes = serializers.FloatField(read_only=True)
+    average_price = serializers.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        read_only=True,
+    )
+
+    class Meta:
+        model = RecipeStats
+        fields = [
+            'recipe_count',
+            'total_time_minutes',
+            'average_time_minutes',
+            'total_price',
+            'average_price',
+        ]
+        read_only_fields = fields
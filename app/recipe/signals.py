@@ -0,0 +1,121 @@
+"""
+Signal handlers for the recipe app.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from core.models import Recipe, RecipeTombstone
+from core.routers import pin_users_to_primary
+from core.signals import recipes_changed
+from recipe.cache import bump_generations
+
+# Ids of the users being deleted by the current thread
+_deleting = threading.local()
+
+
+def _add_to_batch(user_id):
+    """Record a changed owner in the current batch, if any.
+
+    Return whether there is one: the batch then announces the change
+    once for all its recipes.
+    """
+    user_ids = getattr(_deleting, 'changed_user_ids', None)
+    if user_ids is None:
+        return False
+    user_ids.add(user_id)
+    return True
+
+
+# Any change to a recipe (API, admin, shell...) makes the owner's
+# cached responses stale.
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe_cache(sender, instance, **kwargs):
+    """Invalidate the owner's cached recipe responses."""
+    if not _add_to_batch(instance.user_id):
+        bump_generations([instance.user_id])
+
+
+# Bulk changes through RecipeQuerySet
+@receiver(recipes_changed, sender=Recipe)
+def invalidate_recipe_cache_bulk(sender, user_ids, **kwargs):
+    """Invalidate the cached recipe responses of the given users."""
+    bump_generations(user_ids)
+
+
+# Whoever changed the recipes (API, admin, import_recipes...), the
+# owner reads from the primary for a while, so a lagging replica can't
+# serve the old rows and get them cached under the new generation.
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def pin_owner_to_primary(sender, instance, **kwargs):
+    """Send the owner's reads to the primary for a while."""
+    if not _add_to_batch(instance.user_id):
+        pin_users_to_primary([instance.user_id])
+
+
+@receiver(recipes_changed, sender=Recipe)
+def pin_owners_to_primary(sender, user_ids, **kwargs):
+    """Send the reads of the given users to the primary for a while."""
+    pin_users_to_primary(user_ids)
+
+
+# Deleted recipes leave a tombstone so delta sync can report them
+@receiver(post_delete, sender=Recipe)
+def create_recipe_tombstone(sender, instance, **kwargs):
+    """Record the deletion of a recipe."""
+    # Recipes deleted together with their user need no tombstone, it
+    # would point at the user being deleted.
+    if instance.user_id in getattr(_deleting, 'user_ids', ()):
+        return
+    tombstone = RecipeTombstone(
+        user_id=instance.user_id,
+        recipe_id=instance.id,
+    )
+    batch = getattr(_deleting, 'tombstones', None)
+    if batch is None:
+        tombstone.save()
+    else:
+        batch.append(tombstone)
+
+
+@contextmanager
+def batch_tombstones():
+    """Write the tombstones of the recipes deleted inside in one query.
+
+    The owners' caches are invalidated and their reads pinned to the
+    primary once for the whole batch too, as for bulk updates.
+    """
+    # Otherwise deleting N recipes inserts N tombstones one by one, and
+    # bumps the generation and pins the owner (on commit too) N times
+    _deleting.tombstones = []
+    _deleting.changed_user_ids = set()
+    try:
+        yield
+        RecipeTombstone.objects.bulk_create(_deleting.tombstones)
+        recipes_changed.send(
+            sender=Recipe,
+            user_ids=_deleting.changed_user_ids,
+        )
+    finally:
+        del _deleting.tombstones
+        del _deleting.changed_user_ids
+
+
+# pre_delete is sent for the user before any of its recipes are removed
+@receiver(pre_delete, sender=get_user_model())
+def mark_user_deleting(sender, instance, **kwargs):
+    """Remember the user is being deleted."""
+    if not hasattr(_deleting, 'user_ids'):
+        _deleting.user_ids = set()
+    _deleting.user_ids.add(instance.pk)
+
+
+@receiver(post_delete, sender=get_user_model())
+def unmark_user_deleting(sender, instance, **kwargs):
+    """Forget the user was being deleted."""
+    getattr(_deleting, 'user_ids', set()).discard(instance.pk)
@@ -0,0 +1,198 @@
+"""
+Tests for the recipe bulk endpoints.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipe.tests.test_recipe_api import create_recipe
+
+BULK_URL = reverse('recipe:recipe-bulk')
+BULK_DELETE_URL = reverse('recipe:recipe-bulk-delete')
+
+
+def recipe_payload(**params):
+    """Return a valid recipe payload."""
+    payload = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': '4.50',
+    }
+    payload.update(params)
+    return payload
+
+
+class RecipeBulkApiTests(TestCase):
+    """Test creating, updating and deleting recipes in batches."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create(self):
+        """Test creating many recipes with a single insert."""
+        payload = [recipe_payload(title=f'Recipe {i}') for i in range(3)]
+
+        # Transaction savepoint, bulk insert, release
+        with self.assertNumQueries(3):
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 3)
+        recipes = Recipe.objects.filter(user=self.user).order_by('id')
+        self.assertEqual(
+            [recipe.title for recipe in recipes],
+            ['Recipe 0', 'Recipe 1', 'Recipe 2'],
+        )
+
+    def test_bulk_create_per_item_errors(self):
+        """Test invalid items are reported and nothing is saved."""
+        payload = [
+            recipe_payload(),
+            recipe_payload(time_minutes='abc'),
+            recipe_payload(),
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('time_minutes', res.data[1])
+        self.assertEqual(res.data[2], {})
+        self.assertFalse(Recipe.objects.exists())
+
+    @override_settings(RECIPE_BULK_MAX_BATCH_SIZE=2)
+    def test_bulk_create_max_batch_size(self):
+        """Test batches above the maximum size are refused."""
+        payload = [recipe_payload() for _ in range(3)]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_update(self):
+        """Test updating many recipes at once."""
+        first = create_recipe(user=self.user, title='First')
+        second = create_recipe(user=self.user, title='Second')
+        payload = [
+            {'id': first.id, 'title': 'First updated'},
+            {'id': second.id, 'price': '9.99'},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.title, 'First updated')
+        self.assertEqual(second.title, 'Second')
+        self.assertEqual(second.price, Decimal('9.99'))
+
+    def test_bulk_update_other_user_not_found(self):
+        """Test other users' recipes can not be updated."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        mine = create_recipe(user=self.user, title='Mine')
+        theirs = create_recipe(user=other, title='Theirs')
+        payload = [
+            {'id': mine.id, 'title': 'Changed'},
+            {'id': theirs.id, 'title': 'Changed'},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('id', res.data[1])
+        mine.refresh_from_db()
+        theirs.refresh_from_db()
+        self.assertEqual(mine.title, 'Mine')
+        self.assertEqual(theirs.title, 'Theirs')
+
+    def test_bulk_update_invalid_items(self):
+        """Test items that aren't objects with an id are reported."""
+        recipe = create_recipe(user=self.user, title='Mine')
+        payload = [None, 'abc', {'title': 'No id'},
+                   {'id': 'abc', 'title': 'Bad id'},
+                   {'id': recipe.id, 'title': 'Changed'}]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', res.data[0])
+        self.assertNotIn('id', res.data[0])
+        self.assertIn('non_field_errors', res.data[1])
+        self.assertIn('id', res.data[2])
+        self.assertIn('id', res.data[3])
+        self.assertEqual(res.data[4], {})
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Mine')
+
+    def test_bulk_update_duplicate_ids(self):
+        """Test an id can only be updated once per batch."""
+        recipe = create_recipe(user=self.user, title='Mine')
+        payload = [
+            {'id': recipe.id, 'title': 'First'},
+            {'id': recipe.id, 'title': 'Second'},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('id', res.data[1])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Mine')
+
+    def test_bulk_delete(self):
+        """Test deleting many recipes at once."""
+        recipes = [create_recipe(user=self.user) for _ in range(3)]
+        payload = {'ids': [recipes[0].id, recipes[1].id]}
+
+        res = self.client.post(BULK_DELETE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            list(Recipe.objects.values_list('id', flat=True)),
+            [recipes[2].id],
+        )
+
+    @patch('recipe.signals.pin_users_to_primary')
+    @patch('recipe.signals.bump_generations')
+    def test_bulk_delete_invalidates_once(self, bump, pin):
+        """Test the owner's cache is invalidated once per batch."""
+        recipes = [create_recipe(user=self.user) for _ in range(3)]
+        bump.reset_mock()
+        pin.reset_mock()
+
+        self.client.post(BULK_DELETE_URL, {
+            'ids': [recipe.id for recipe in recipes],
+        }, format='json')
+
+        bump.assert_called_once_with({self.user.id})
+        pin.assert_called_once_with({self.user.id})
+
+    def test_bulk_delete_missing_ids(self):
+        """Test unknown ids are reported and nothing is deleted."""
+        recipe = create_recipe(user=self.user)
+        payload = {'ids': [recipe.id, recipe.id + 1000]}
+
+        res = self.client.post(BULK_DELETE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(1, res.data['ids'])
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
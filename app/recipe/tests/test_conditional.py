@@ -0,0 +1,156 @@
+"""
+Tests for conditional GET (ETag / Last-Modified) on the recipe API.
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, RecipeTombstone
+from recipe.cache import get_cache
+from recipe.tests.test_recipe_api import RECIPE_URL, create_recipe
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag and Last-Modified handling."""
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+
+    def test_list_has_validators(self):
+        """Test the list response carries ETag and Last-Modified."""
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['ETag'].startswith('"'))
+        self.assertEqual(
+            res['Last-Modified'],
+            http_date(int(self.recipe.updated_at.timestamp())),
+        )
+
+    def test_list_if_none_match_aggregate_queries(self):
+        """Test a matching ETag gets a 304 after two aggregate queries."""
+        etag = self.client.get(RECIPE_URL)['ETag']
+        # Drop the cached validators to see the cold path
+        get_cache().clear()
+
+        # Recipes, then tombstones
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_list_if_none_match_cached_validators(self):
+        """Test a repeated 304 is answered without queries."""
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_if_modified_since(self):
+        """Test If-Modified-Since gets a 304 when nothing changed."""
+        last_modified = self.client.get(RECIPE_URL)['Last-Modified']
+
+        res = self.client.get(
+            RECIPE_URL,
+            HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_if_modified_since_after_delete(self):
+        """Test a delete makes the list newer than the client copy."""
+        other = create_recipe(user=self.user)
+        last_modified = self.client.get(RECIPE_URL)['Last-Modified']
+        other_id = other.id
+        other.delete()
+        # Deleted in a later second than the last update
+        RecipeTombstone.objects.filter(recipe_id=other_id).update(
+            deleted_at=other.updated_at + timedelta(seconds=2),
+        )
+
+        res = self.client.get(
+            RECIPE_URL,
+            HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [self.recipe.id],
+        )
+
+    def test_list_etag_changes_on_write(self):
+        """Test create, update and delete all change the list ETag."""
+        etags = {self.client.get(RECIPE_URL)['ETag']}
+
+        other = create_recipe(user=self.user)
+        etags.add(self.client.get(RECIPE_URL)['ETag'])
+        Recipe.objects.filter(id=self.recipe.id).update(title='New')
+        etags.add(self.client.get(RECIPE_URL)['ETag'])
+        other.delete()
+        etags.add(self.client.get(RECIPE_URL)['ETag'])
+
+        self.assertEqual(len(etags), 4)
+
+    def test_list_etag_depends_on_query(self):
+        """Test each page of the list has its own ETag."""
+        first = self.client.get(RECIPE_URL)['ETag']
+        second = self.client.get(RECIPE_URL, {'page_size': 1})['ETag']
+
+        self.assertNotEqual(first, second)
+
+    def test_stale_etag_gets_full_response(self):
+        """Test a non matching ETag gets the full response."""
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH='"stale"')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_detail_if_none_match(self):
+        """Test detail responses support ETag revalidation."""
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.recipe.title = 'Changed'
+        self.recipe.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'Changed')
+
+    def test_detail_other_user_not_found(self):
+        """Test ETags are not computed for other users' recipes."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        recipe = create_recipe(user=other)
+
+        res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('ETag', res)
@@ -0,0 +1,82 @@
+"""
+Tests for the recipe export endpoint.
+"""
+import csv
+import io
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe.tests.test_recipe_api import create_recipe
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class RecipeExportTests(TestCase):
+    """Test streaming the recipe library."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(
+            user=self.user,
+            title='Soup, hot',
+            price=Decimal('3.50'),
+        )
+
+    def export(self, **params):
+        """Call the export endpoint and return the body as text."""
+        res = self.client.get(EXPORT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        return b''.join(res.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        """Test recipes are exported one JSON object per line."""
+        lines = self.export().splitlines()
+
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0]), {
+            'id': self.recipe.id,
+            'title': 'Soup, hot',
+            'time_minutes': 22,
+            'price': '3.50',
+            'link': 'http://example.com/recipe.pdf',
+        })
+
+    def test_export_csv(self):
+        """Test recipes are exported as CSV with a header."""
+        rows = list(csv.reader(io.StringIO(self.export(export_format='csv'))))
+
+        self.assertEqual(
+            rows[0],
+            ['id', 'title', 'time_minutes', 'price', 'link'],
+        )
+        self.assertEqual(rows[1][1], 'Soup, hot')
+        self.assertEqual(rows[1][3], '3.50')
+
+    def test_export_limited_to_user(self):
+        """Test only the user's recipes are exported."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        create_recipe(user=other)
+
+        self.assertEqual(len(self.export().splitlines()), 1)
+
+    def test_export_unknown_format(self):
+        """Test an unknown export format is refused."""
+        res = self.client.get(EXPORT_URL, {'export_format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
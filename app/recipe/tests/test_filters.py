@@ -0,0 +1,144 @@
+"""
+Tests for filtering and ordering the recipe list.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipe.filters import RecipeOrderingFilter
+from recipe.tests.test_recipe_api import RECIPE_URL, create_recipe
+
+
+class RecipeFilterTests(TestCase):
+    """Test range filters and ordering on the recipe list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        create_recipe(user=self.user, title='Soup',
+                      time_minutes=20, price=Decimal('3.00'))
+        create_recipe(user=self.user, title='Roast',
+                      time_minutes=90, price=Decimal('15.00'))
+        create_recipe(user=self.user, title='Salad',
+                      time_minutes=10, price=Decimal('8.50'))
+
+    def get_titles(self, **params):
+        """Return the titles of the recipe list, following every page."""
+        res = self.client.get(RECIPE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        titles = [recipe['title'] for recipe in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            titles += [recipe['title'] for recipe in res.data['results']]
+        return titles
+
+    def test_filter_time_minutes(self):
+        """Test filtering recipes by cooking time."""
+        self.assertEqual(
+            self.get_titles(time_minutes_max=30),
+            ['Salad', 'Soup'],
+        )
+        self.assertEqual(self.get_titles(time_minutes_min=30), ['Roast'])
+
+    def test_filter_price(self):
+        """Test filtering recipes by price."""
+        self.assertEqual(
+            self.get_titles(price_min='5', price_max='10'),
+            ['Salad'],
+        )
+
+    def test_filter_invalid_value(self):
+        """Test invalid filter values are refused."""
+        res = self.client.get(RECIPE_URL, {'price_max': 'cheap'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('price_max', res.data)
+
+    def test_ordering(self):
+        """Test ordering by each supported field, both ways."""
+        self.assertEqual(
+            self.get_titles(ordering='time_minutes'),
+            ['Salad', 'Soup', 'Roast'],
+        )
+        self.assertEqual(
+            self.get_titles(ordering='-price'),
+            ['Roast', 'Salad', 'Soup'],
+        )
+        self.assertEqual(
+            self.get_titles(ordering='title'),
+            ['Roast', 'Salad', 'Soup'],
+        )
+
+    def test_ordering_paginated(self):
+        """Test ordered results can be paged through with a cursor."""
+        create_recipe(user=self.user, title='Stew', time_minutes=20)
+
+        self.assertEqual(
+            self.get_titles(ordering='time_minutes', page_size=1),
+            ['Salad', 'Soup', 'Stew', 'Roast'],
+        )
+
+    def test_ordering_paginated_ties(self):
+        """Test pages don't loop or skip over many equal values."""
+        # More ties than DRF's cursor offset cutoff (1000)
+        Recipe.objects.bulk_create([
+            Recipe(user=self.user, title=f'Stew {n}', time_minutes=30,
+                   price=Decimal('5.00'))
+            for n in range(1300)
+        ])
+        expected = list(Recipe.objects.filter(user=self.user).order_by(
+            'time_minutes', 'id',
+        ).values_list('id', flat=True))
+
+        res = self.client.get(RECIPE_URL, {'ordering': 'time_minutes',
+                                           'page_size': 200})
+        pages = [[recipe['id'] for recipe in res.data['results']]]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            pages.append([recipe['id'] for recipe in res.data['results']])
+
+        self.assertEqual(len(pages), 7)
+        self.assertEqual(sum(pages, []), expected)
+
+        # And back again with the previous links
+        res = self.client.get(res.data['previous'])
+        self.assertEqual([recipe['id'] for recipe in res.data['results']],
+                         pages[-2])
+
+    def test_invalid_cursor(self):
+        """Test a tampered cursor is refused."""
+        res = self.client.get(RECIPE_URL, {'ordering': 'price',
+                                           'cursor': 'cD1bIngiLCAxXQ=='})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @patch.dict(RecipeOrderingFilter.orderings, {'mixed': ('price', '-id')})
+    def test_mixed_ordering_refused(self):
+        """Test an ordering mixing directions can't be paginated."""
+        res = self.client.get(RECIPE_URL, {'ordering': 'mixed'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_and_ordering(self):
+        """Test filters and ordering can be combined."""
+        self.assertEqual(
+            self.get_titles(time_minutes_max=30, ordering='-price'),
+            ['Salad', 'Soup'],
+        )
+
+    def test_invalid_ordering(self):
+        """Test ordering by an unsupported field is refused."""
+        res = self.client.get(RECIPE_URL, {'ordering': 'description'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ordering', res.data)
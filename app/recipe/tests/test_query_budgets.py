@@ -0,0 +1,71 @@
+"""
+Tests for the query budgets of the recipe endpoints.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.testing import QueryBudgetMixin
+from recipe.tests.test_recipe_api import create_recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Return the URL of a recipe."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class RecipeQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test the recipe endpoints stay within their query budgets."""
+    # Authenticated with a token, and with several recipes, so an
+    # N+1 query or an uncached token lookup shows in the count.
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.recipes = [
+            create_recipe(user=self.user, title=f'Recipe {n}')
+            for n in range(5)
+        ]
+
+    def test_reads(self):
+        """Test reading recipes stays within budget."""
+        for url in (
+            RECIPES_URL,
+            detail_url(self.recipes[0].id),
+            reverse('recipe:recipe-stats'),
+            reverse('recipe:recipe-changes'),
+            reverse('recipe:recipe-export'),
+        ):
+            with self.subTest(url=url):
+                self.assertWithinQueryBudget(self.client.get(url))
+
+    def test_writes(self):
+        """Test writing recipes stays within budget."""
+        payload = {'title': 'New', 'time_minutes': 5, 'price': '1.00'}
+        recipe = self.recipes[0]
+
+        for response in (
+            self.client.post(RECIPES_URL, payload),
+            self.client.patch(detail_url(recipe.id), {'title': 'Changed'}),
+            self.client.delete(detail_url(recipe.id)),
+            self.client.post(reverse('recipe:recipe-bulk'), [payload] * 3,
+                             format='json'),
+            self.client.post(reverse('recipe:recipe-bulk-delete'), {
+                'ids': [r.id for r in self.recipes[1:]],
+            }, format='json'),
+        ):
+            with self.subTest(endpoint=response.request_metrics.endpoint):
+                self.assertLess(response.status_code, 300)
+                self.assertWithinQueryBudget(response)
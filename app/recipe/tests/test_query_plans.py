@@ -0,0 +1,127 @@
+"""
+Query plan regression tests for the recipe API.
+
+These tests seed a large dataset and check the EXPLAIN output of the
+RecipeViewSet querysets, so a missing or unused index shows up as a
+failing test instead of a slow endpoint in production.
+"""
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.models import Recipe
+from recipe.pagination import RecipeCursorPagination
+from recipe.views import RecipeViewSet
+
+# Size of the seeded dataset. Big enough for the planner to prefer
+# an index over a sequential scan plus sort.
+NUM_USERS = 100
+RECIPES_PER_USER = 200
+
+
+def get_view_queryset(user, **params):
+    """Return the queryset RecipeViewSet lists for the given user."""
+    request = Request(APIRequestFactory().get('/', params))
+    request.user = user
+    view = RecipeViewSet(request=request, format_kwarg=None)
+    return view.filter_queryset(view.get_queryset())
+
+
+@skipUnless(
+    connection.vendor == 'postgresql',
+    'Query plans are only checked on PostgreSQL.',
+)
+class RecipeQueryPlanTests(TestCase):
+    """Test the recipe list queries are served by indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = get_user_model().objects.bulk_create([
+            get_user_model()(email=f'user{i}@example.com')
+            for i in range(NUM_USERS)
+        ])
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=user,
+                title=f'Recipe {n}',
+                time_minutes=n % 120,
+                price=Decimal(n % 100),
+            )
+            for n in range(RECIPES_PER_USER)
+            for user in users
+        ], batch_size=2000)
+        # Refresh planner statistics for the freshly seeded rows
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_recipe')
+        cls.user = users[0]
+
+    def assertUsesIndex(self, queryset, index_name):
+        """Assert queryset is served by index_name with no sort step."""
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotIn('Seq Scan', plan)
+        self.assertNotIn('Sort', plan)
+
+    def test_list_first_page_uses_index(self):
+        """Test first page of the list reads the user/id index."""
+        queryset = get_view_queryset(self.user)
+
+        self.assertUsesIndex(queryset[:50], 'recipe_user_id_desc_idx')
+
+    def test_list_cursor_page_uses_index(self):
+        """Test a page after a cursor is a range scan on the index."""
+        queryset = get_view_queryset(self.user)
+        middle_id = queryset[RECIPES_PER_USER // 2].id
+
+        self.assertUsesIndex(
+            queryset.filter(id__lt=middle_id)[:50],
+            'recipe_user_id_desc_idx',
+        )
+
+    def test_search_uses_index(self):
+        """Test searching never scans the whole recipe table."""
+        queryset = get_view_queryset(self.user, search='recipe 42')
+
+        plan = queryset.order_by('-search_rank', '-id')[:50].explain()
+
+        self.assertNotIn('Seq Scan', plan)
+
+    def test_range_filter_ordering_uses_index(self):
+        """Test filtered, sorted pages are index range scans."""
+        orderings = {
+            'time_minutes': ('recipe_user_time_idx', 'time_minutes_min'),
+            'price': ('recipe_user_price_idx', 'price_min'),
+        }
+        for field, (index_name, param) in orderings.items():
+            for ordering in (field, f'-{field}'):
+                with self.subTest(ordering=ordering):
+                    queryset = get_view_queryset(
+                        self.user, ordering=ordering, **{param: 10},
+                    )
+
+                    self.assertUsesIndex(queryset[:50], index_name)
+
+    def test_ordered_cursor_page_uses_index(self):
+        """Test a page after a (field, id) cursor is an index range scan."""
+        queryset = get_view_queryset(self.user, ordering='time_minutes')
+        middle = queryset[RECIPES_PER_USER // 2]
+        paginator = RecipeCursorPagination()
+        paginator.ordering = ('time_minutes', 'id')
+
+        self.assertUsesIndex(
+            paginator.filter_after(
+                queryset, [middle.time_minutes, middle.id], 'gt',
+            )[:50],
+            'recipe_user_time_idx',
+        )
+
+    def test_title_ordering_uses_index(self):
+        """Test ordering by title reads the title index."""
+        queryset = get_view_queryset(self.user, ordering='title')
+
+        self.assertUsesIndex(queryset[:50], 'recipe_user_title_idx')
@@ -1,4 +1,7 @@
 from decimal import Decimal
+from unittest.mock import patch
+
+import msgpack
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase
@@ -70,8 +73,9 @@ class PrivateRecipeApiTest(TestCase):
         serializer = RecipeSerializer(recipe, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        # Making sure data from serializer and res match
-        self.assertEqual(res.data, serializer.data)
+        # Making sure data from serializer and res match. The list
+        # is paginated, so the recipes are under 'results'
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         """Test list of recipes is limited to authenticated users."""
@@ -95,5 +99,75 @@ class PrivateRecipeApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         # Checking that res and serializer match (do not include data)
         # for user2
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_recipe_list_paginated(self):
+        """Test recipe list is split in pages linked by a cursor."""
+        for i in range(5):
+            create_recipe(user=self.user, title=f'Recipe {i}')
+
+        # Asking for pages of 2 recipes
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNone(res.data['previous'])
+        self.assertIsNotNone(res.data['next'])
+
+        # Following the next links until the last page
+        titles = [r['title'] for r in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            titles += [r['title'] for r in res.data['results']]
+
+        # Every recipe shows up once, newest first
+        self.assertEqual(titles, [f'Recipe {i}' for i in range(4, -1, -1)])
+
+    def test_recipe_list_cursor_is_opaque(self):
+        """Test next link uses a cursor instead of an offset."""
+        for _ in range(3):
+            create_recipe(user=self.user)
+
+        res = self.client.get(RECIPE_URL, {'page_size': 1})
+
+        self.assertIn('cursor=', res.data['next'])
+        self.assertNotIn('offset=', res.data['next'])
+
+    @patch(
+        'recipe.pagination.RecipeCursorPagination.max_page_size', 3
+    )
+    def test_recipe_list_page_size_capped(self):
+        """Test page_size can not go above the configured maximum."""
+        for _ in range(5):
+            create_recipe(user=self.user)
+
+        res = self.client.get(RECIPE_URL, {'page_size': 1000})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 3)
+
+    def test_recipe_list_msgpack(self):
+        """Test the list is sent as MessagePack when asked for."""
+        recipe = create_recipe(user=self.user)
+
+        res = self.client.get(RECIPE_URL, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(res.content)
+        self.assertEqual(data['results'],
+                         [RecipeSerializer(recipe).data])
+
+    def test_create_recipe_msgpack(self):
+        """Test a recipe can be created from a MessagePack body."""
+        payload = {'title': 'Sample', 'time_minutes': 5, 'price': '2.50'}
+
+        res = self.client.post(
+            RECIPE_URL,
+            msgpack.packb(payload),
+            content_type='application/msgpack',
+        )
 
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.price, Decimal('2.50'))
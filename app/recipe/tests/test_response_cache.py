@@ -0,0 +1,133 @@
+"""
+Tests for the per-user recipe response cache.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipe.cache import get_cache
+from recipe.tests.test_recipe_api import RECIPE_URL, create_recipe
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class RecipeResponseCacheTests(TestCase):
+    """Test caching of recipe list and detail responses."""
+
+    def setUp(self):
+        # Start every test with an empty cache
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def get_titles(self, params=None):
+        """Return the titles in the recipe list."""
+        res = self.client.get(RECIPE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_repeated_list_skips_db(self):
+        """Test a repeated list request does not query the db."""
+        create_recipe(user=self.user)
+        first = self.client.get(RECIPE_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(RECIPE_URL)
+
+        self.assertEqual(second.data, first.data)
+
+    def test_repeated_detail_skips_db(self):
+        """Test a repeated detail request does not query the db."""
+        recipe = create_recipe(user=self.user)
+        first = self.client.get(detail_url(recipe.id))
+
+        with self.assertNumQueries(0):
+            second = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(second.data, first.data)
+
+    def test_query_params_cached_separately(self):
+        """Test different query params get their own entries."""
+        for i in range(3):
+            create_recipe(user=self.user, title=f'Recipe {i}')
+
+        self.assertEqual(len(self.get_titles()), 3)
+        self.assertEqual(len(self.get_titles({'page_size': 1})), 1)
+
+    def test_cache_per_user(self):
+        """Test users never see each other's cached responses."""
+        create_recipe(user=self.user, title='Mine')
+        self.get_titles()
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        create_recipe(user=other, title='Theirs')
+
+        self.client.force_authenticate(other)
+
+        self.assertEqual(self.get_titles(), ['Theirs'])
+
+    def test_create_through_api_invalidates(self):
+        """Test creating a recipe shows up in the next list."""
+        self.get_titles()
+        payload = {
+            'title': 'New recipe',
+            'time_minutes': 10,
+            'price': Decimal('2.50'),
+        }
+
+        res = self.client.post(RECIPE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.get_titles(), ['New recipe'])
+
+    def test_save_and_delete_invalidate(self):
+        """Test saving or deleting a recipe invalidates the cache."""
+        recipe = create_recipe(user=self.user, title='Old title')
+        self.client.get(detail_url(recipe.id))
+
+        recipe.title = 'New title'
+        recipe.save()
+        res = self.client.get(detail_url(recipe.id))
+        self.assertEqual(res.data['title'], 'New title')
+
+        recipe.delete()
+        res = self.client.get(detail_url(recipe.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_changes_invalidate(self):
+        """Test update/bulk_create/bulk_update/delete invalidate."""
+        recipe = create_recipe(user=self.user, title='Recipe')
+        self.get_titles()
+
+        Recipe.objects.filter(user=self.user).update(title='Updated')
+        self.assertEqual(self.get_titles(), ['Updated'])
+
+        Recipe.objects.bulk_create([Recipe(
+            user=self.user,
+            title='Bulk',
+            time_minutes=1,
+            price=Decimal('1.00'),
+        )])
+        self.assertEqual(sorted(self.get_titles()), ['Bulk', 'Updated'])
+
+        recipe.title = 'Bulk updated'
+        Recipe.objects.bulk_update([recipe], ['title'])
+        self.assertIn('Bulk updated', self.get_titles())
+
+        Recipe.objects.filter(user=self.user).delete()
+        self.assertEqual(self.get_titles(), [])
@@ -0,0 +1,110 @@
+"""
+Tests for searching recipes.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipe.tests.test_recipe_api import RECIPE_URL, create_recipe
+
+
+class RecipeSearchTests(TestCase):
+    """Test the ?search= parameter of the recipe list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def search(self, term, **params):
+        """Return the titles found for a search term."""
+        res = self.client.get(RECIPE_URL, {'search': term, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_search_title_and_description(self):
+        """Test words are found in the title and the description."""
+        create_recipe(user=self.user, title='Chocolate cake',
+                      description='Rich and sweet.')
+        create_recipe(user=self.user, title='Brownies',
+                      description='Made with dark chocolate.')
+        create_recipe(user=self.user, title='Green salad',
+                      description='Fresh vegetables.')
+
+        titles = self.search('chocolate')
+
+        # Title matches rank above description matches
+        self.assertEqual(titles, ['Chocolate cake', 'Brownies'])
+
+    def test_search_stemming(self):
+        """Test searching matches other forms of a word."""
+        create_recipe(user=self.user, title='Baked potatoes')
+
+        self.assertEqual(self.search('potato'), ['Baked potatoes'])
+
+    def test_search_typo(self):
+        """Test a misspelled title is still found."""
+        create_recipe(user=self.user, title='Spaghetti bolognese')
+        create_recipe(user=self.user, title='Green salad')
+
+        self.assertEqual(self.search('spagetti bolognese'),
+                         ['Spaghetti bolognese'])
+
+    def test_search_vector_follows_updates(self):
+        """Test the search document follows title changes."""
+        recipe = create_recipe(user=self.user, title='Pancakes')
+        Recipe.objects.filter(id=recipe.id).update(title='Waffles')
+
+        self.assertEqual(self.search('pancakes'), [])
+        self.assertEqual(self.search('waffles'), ['Waffles'])
+
+    def test_search_limited_to_user(self):
+        """Test other users' recipes are not searched."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        create_recipe(user=other, title='Chocolate cake')
+
+        self.assertEqual(self.search('chocolate'), [])
+
+    def test_search_paginated(self):
+        """Test search results can be paged through."""
+        for i in range(3):
+            create_recipe(user=self.user, title=f'Tomato soup {i}')
+
+        res = self.client.get(RECIPE_URL, {'search': 'tomato',
+                                           'page_size': 2})
+        titles = [recipe['title'] for recipe in res.data['results']]
+        res = self.client.get(res.data['next'])
+        titles += [recipe['title'] for recipe in res.data['results']]
+
+        self.assertEqual(sorted(titles),
+                         ['Tomato soup 0', 'Tomato soup 1', 'Tomato soup 2'])
+
+    def test_search_paginated_equal_ranks(self):
+        """Test many matches with the same rank are each listed once."""
+        # Same title, same rank, more of them than DRF's offset cutoff
+        Recipe.objects.bulk_create([
+            Recipe(user=self.user, title='Tomato soup', time_minutes=10,
+                   price='5.00')
+            for _ in range(1100)
+        ])
+
+        res = self.client.get(RECIPE_URL, {'search': 'tomato',
+                                           'page_size': 200})
+        ids = [recipe['id'] for recipe in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [recipe['id'] for recipe in res.data['results']]
+
+        self.assertEqual(
+            ids,
+            list(Recipe.objects.order_by('-id').values_list('id', flat=True)),
+        )
@@ -0,0 +1,97 @@
+"""
+Tests for the ?fields= parameter of the recipe API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe.tests.test_recipe_api import RECIPE_URL, create_recipe
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class SparseFieldsTests(TestCase):
+    """Test responses limited to the fields asked for."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user, title='Soup',
+                                    price=Decimal('3.00'))
+
+    def get_recipe_queries(self, url, params):
+        """Return the response and the SQL run on core_recipe."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        sql = [
+            query['sql'] for query in queries.captured_queries
+            if 'FROM "core_recipe"' in query['sql']
+        ]
+        return res, sql
+
+    def test_list_fields(self):
+        """Test the list only sends and reads the fields asked for."""
+        res, sql = self.get_recipe_queries(RECIPE_URL,
+                                           {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'],
+                         [{'id': self.recipe.id, 'title': 'Soup'}])
+        for query in sql:
+            self.assertNotIn('"price"', query)
+            self.assertNotIn('"description"', query)
+
+    def test_list_fields_without_ordering_field(self):
+        """Test pages ordered by a field that is not sent."""
+        create_recipe(user=self.user, title='Roast', price=Decimal('1.00'))
+        params = {'fields': 'title', 'ordering': 'price', 'page_size': 1}
+
+        res = self.client.get(RECIPE_URL, params)
+        titles = [recipe['title'] for recipe in res.data['results']]
+        res = self.client.get(res.data['next'])
+        titles += [recipe['title'] for recipe in res.data['results']]
+
+        self.assertEqual(titles, ['Roast', 'Soup'])
+        self.assertEqual(res.data['results'], [{'title': 'Soup'}])
+
+    def test_retrieve_fields(self):
+        """Test the detail only sends and reads the fields asked for."""
+        res, sql = self.get_recipe_queries(detail_url(self.recipe.id),
+                                           {'fields': 'title, price'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'title': 'Soup', 'price': '3.00'})
+        self.assertNotIn('"description"', sql[-1])
+        self.assertNotIn('"link"', sql[-1])
+
+    def test_unknown_field(self):
+        """Test asking for an unknown field is refused."""
+        res = self.client.get(RECIPE_URL, {'fields': 'title,description'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+
+    def test_fields_ignored_on_update(self):
+        """Test ?fields= does not limit what a write returns."""
+        res = self.client.patch(
+            f'{detail_url(self.recipe.id)}?fields=title',
+            {'time_minutes': 5},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['time_minutes'], 5)
+        self.assertIn('price', res.data)
@@ -0,0 +1,179 @@
+"""
+Tests for the recipe stats endpoint.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, RecipeStats
+from recipe.tests.test_recipe_api import create_recipe
+
+STATS_URL = reverse('recipe:recipe-stats')
+
+
+class RecipeStatsTests(TestCase):
+    """Test the per-user recipe totals."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def get_stats(self):
+        """Return the stats of the user through the API."""
+        res = self.client.get(STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def assertStats(self, user, count, time_minutes, price):
+        """Assert the stored totals of a user."""
+        stats = RecipeStats.objects.get(user=user)
+        self.assertEqual(stats.recipe_count, count)
+        self.assertEqual(stats.total_time_minutes, time_minutes)
+        self.assertEqual(stats.total_price, Decimal(price))
+
+    def test_stats_no_recipes(self):
+        """Test a user without recipes gets zero totals."""
+        self.assertEqual(self.get_stats(), {
+            'recipe_count': 0,
+            'total_time_minutes': 0,
+            'average_time_minutes': None,
+            'total_price': '0.00',
+            'average_price': None,
+        })
+
+    def test_stats(self):
+        """Test the totals and averages of the user's recipes."""
+        create_recipe(user=self.user, time_minutes=10, price=Decimal('2.50'))
+        create_recipe(user=self.user, time_minutes=25, price=Decimal('4.00'))
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        create_recipe(user=other, time_minutes=99, price=Decimal('99.00'))
+
+        self.assertEqual(self.get_stats(), {
+            'recipe_count': 2,
+            'total_time_minutes': 35,
+            'average_time_minutes': 17.5,
+            'total_price': '6.50',
+            'average_price': '3.25',
+        })
+
+    def test_stats_single_query(self):
+        """Test the stats are one row lookup, whatever the recipe count."""
+        Recipe.objects.bulk_create([
+            Recipe(user=self.user, title=f'Recipe {i}',
+                   time_minutes=i, price=Decimal('1.00'))
+            for i in range(50)
+        ])
+
+        with self.assertNumQueries(1):
+            self.get_stats()
+
+    def test_stats_follow_changes(self):
+        """Test updates and deletes are applied to the totals."""
+        recipe = create_recipe(user=self.user, time_minutes=10,
+                               price=Decimal('2.00'))
+        create_recipe(user=self.user, time_minutes=20, price=Decimal('3.00'))
+        self.assertStats(self.user, 2, 30, '5.00')
+
+        recipe.time_minutes = 40
+        recipe.price = Decimal('1.00')
+        recipe.save()
+        self.assertStats(self.user, 2, 60, '4.00')
+
+        # Other fields leave the totals alone
+        recipe.title = 'Renamed'
+        recipe.save()
+        self.assertStats(self.user, 2, 60, '4.00')
+
+        recipe.delete()
+        self.assertStats(self.user, 1, 20, '3.00')
+
+    def test_stats_follow_bulk_changes(self):
+        """Test queryset updates and deletes are applied to the totals."""
+        for minutes in (10, 20, 30):
+            create_recipe(user=self.user, time_minutes=minutes,
+                          price=Decimal('1.00'))
+
+        Recipe.objects.filter(user=self.user).update(price=Decimal('2.00'))
+        self.assertStats(self.user, 3, 60, '6.00')
+
+        Recipe.objects.filter(time_minutes__gte=20).delete()
+        self.assertStats(self.user, 1, 10, '2.00')
+
+    def test_stats_follow_statements_over_users(self):
+        """Test one statement changing several users' recipes."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        Recipe.objects.bulk_create([
+            Recipe(user=user, title=f'Recipe {i}',
+                   time_minutes=i, price=Decimal('1.00'))
+            for user in (self.user, other)
+            for i in (5, 10, 15)
+        ])
+        self.assertStats(self.user, 3, 30, '3.00')
+        self.assertStats(other, 3, 30, '3.00')
+
+        # One UPDATE moves some recipes and changes others
+        Recipe.objects.filter(time_minutes__gte=10).update(
+            user=other,
+            price=Decimal('2.50'),
+        )
+        self.assertStats(self.user, 1, 5, '1.00')
+        self.assertStats(other, 5, 55, '11.00')
+
+        Recipe.objects.filter(time_minutes__lte=10).delete()
+        self.assertStats(self.user, 0, 0, '0.00')
+        self.assertStats(other, 2, 30, '5.00')
+
+    def test_stats_statement_triggers(self):
+        """Test the totals are kept by statement-level triggers."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT tgname, tgtype & 1 FROM pg_trigger "
+                "WHERE tgrelid = 'core_recipe'::regclass "
+                "AND tgname LIKE 'core_recipe_stats%%'"
+            )
+            triggers = dict(cursor.fetchall())
+
+        # Bit 0 of tgtype is set for row-level triggers
+        self.assertEqual(triggers, {
+            'core_recipe_stats_insert_trigger': 0,
+            'core_recipe_stats_update_trigger': 0,
+            'core_recipe_stats_delete_trigger': 0,
+        })
+
+    def test_stats_follow_owner_change(self):
+        """Test moving a recipe to another user moves its totals."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        recipe = create_recipe(user=self.user, time_minutes=10,
+                               price=Decimal('2.00'))
+
+        Recipe.objects.filter(id=recipe.id).update(user=other)
+
+        self.assertStats(self.user, 0, 0, '0.00')
+        self.assertStats(other, 1, 10, '2.00')
+
+    def test_stats_deleted_with_user(self):
+        """Test deleting a user deletes their totals."""
+        create_recipe(user=self.user)
+
+        self.user.delete()
+
+        self.assertFalse(RecipeStats.objects.exists())
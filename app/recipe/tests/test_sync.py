@@ -0,0 +1,129 @@
+"""
+Tests for the recipe delta sync endpoint.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, RecipeTombstone
+from recipe.tests.test_recipe_api import create_recipe
+
+CHANGES_URL = reverse('recipe:recipe-changes')
+
+
+@override_settings(RECIPE_SYNC_SETTLE_SECONDS=0)
+class RecipeSyncTests(TestCase):
+    """Test syncing recipe changes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def sync(self, token=None):
+        """Call the changes endpoint and return the response data."""
+        params = {'sync_token': token} if token else {}
+        res = self.client.get(CHANGES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_first_sync_returns_everything(self):
+        """Test syncing without a token returns all recipes."""
+        create_recipe(user=self.user, title='One')
+        create_recipe(user=self.user, title='Two')
+
+        data = self.sync()
+
+        self.assertEqual(
+            [recipe['title'] for recipe in data['changed']],
+            ['One', 'Two'],
+        )
+        self.assertEqual(data['deleted'], [])
+        self.assertFalse(data['has_more'])
+        self.assertTrue(data['sync_token'])
+
+    def test_sync_returns_only_changes(self):
+        """Test a sync only returns what changed since the token."""
+        recipe = create_recipe(user=self.user, title='Old')
+        create_recipe(user=self.user, title='Untouched')
+        token = self.sync()['sync_token']
+
+        recipe.title = 'New'
+        recipe.save()
+        data = self.sync(token)
+
+        self.assertEqual([r['title'] for r in data['changed']], ['New'])
+        self.assertEqual(self.sync(data['sync_token'])['changed'], [])
+
+    def test_sync_returns_deletions(self):
+        """Test deleted recipes are reported by id."""
+        recipe = create_recipe(user=self.user)
+        token = self.sync()['sync_token']
+
+        recipe_id = recipe.id
+        recipe.delete()
+        data = self.sync(token)
+
+        self.assertEqual(data['changed'], [])
+        self.assertEqual(data['deleted'], [recipe_id])
+
+    def test_sync_limited_to_user(self):
+        """Test other users' changes are not returned."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        create_recipe(user=other).delete()
+
+        data = self.sync()
+
+        self.assertEqual(data['changed'], [])
+        self.assertEqual(data['deleted'], [])
+
+    @override_settings(RECIPE_SYNC_MAX_CHANGES=2)
+    def test_sync_in_batches(self):
+        """Test large syncs are split without skipping rows."""
+        for i in range(5):
+            create_recipe(user=self.user, title=f'Recipe {i}')
+        # Same updated_at for every row, the id breaks the tie
+        Recipe.objects.filter(user=self.user).update(title='Same')
+
+        ids = []
+        data = self.sync()
+        ids += [recipe['id'] for recipe in data['changed']]
+        while data['has_more']:
+            data = self.sync(data['sync_token'])
+            ids += [recipe['id'] for recipe in data['changed']]
+
+        self.assertEqual(
+            ids,
+            list(Recipe.objects.order_by('id').values_list('id', flat=True)),
+        )
+
+    @override_settings(RECIPE_SYNC_SETTLE_SECONDS=60)
+    def test_sync_waits_for_changes_to_settle(self):
+        """Test very recent changes are left for the next sync."""
+        create_recipe(user=self.user)
+
+        self.assertEqual(self.sync()['changed'], [])
+
+    def test_invalid_token(self):
+        """Test a tampered token is rejected."""
+        res = self.client.get(CHANGES_URL, {'sync_token': 'bad-token'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deleting_user_skips_tombstones(self):
+        """Test deleting a user deletes its recipes without tombstones."""
+        create_recipe(user=self.user)
+
+        self.user.delete()
+
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(RecipeTombstone.objects.exists())
@@ -0,0 +1,101 @@
+"""
+Tests for the values() list path of the recipe API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipe.serializers import RecipeSerializer, ValuesRepresentation
+from recipe.tests.test_recipe_api import RECIPE_URL, create_recipe
+
+
+class ValuesRepresentationTests(TestCase):
+    """Test ValuesRepresentation matches RecipeSerializer."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        for price in ('0.01', '5', '5.5', '999.99'):
+            create_recipe(user=self.user, price=Decimal(price))
+        create_recipe(user=self.user, title='Crêpes ☕', link='')
+
+    def test_parity_with_serializer(self):
+        """Test the output is identical to RecipeSerializer's."""
+        queryset = Recipe.objects.order_by('id')
+        representation = ValuesRepresentation(RecipeSerializer)
+
+        self.assertEqual(
+            representation.to_representation(
+                queryset.values(*representation.sources)
+            ),
+            RecipeSerializer(queryset, many=True).data,
+        )
+
+    def test_same_field_order(self):
+        """Test fields come in the serializer's order."""
+        representation = ValuesRepresentation(RecipeSerializer)
+
+        rows = Recipe.objects.values(*representation.sources)
+        item = representation.to_representation(rows)[0]
+
+        self.assertEqual(list(item), list(RecipeSerializer().fields))
+
+
+class RecipeListParityTests(TestCase):
+    """Test the recipe list API output matches RecipeSerializer."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        for n in range(5):
+            create_recipe(
+                user=self.user,
+                title=f'Tomato soup {n}',
+                time_minutes=n * 7 % 5,
+                price=Decimal(n) / 4,
+            )
+
+    def test_list_parity(self):
+        """Test each ordering and search page matches the serializer."""
+        cases = [
+            ({}, ['-id']),
+            ({'ordering': 'price'}, ['price', 'id']),
+            ({'ordering': '-time_minutes'}, ['-time_minutes', '-id']),
+            ({'search': 'tomato', 'ordering': 'title'}, ['title', 'id']),
+        ]
+        for params, ordering in cases:
+            with self.subTest(params=params):
+                res = self.client.get(RECIPE_URL, {**params, 'page_size': 2})
+                expected = RecipeSerializer(
+                    Recipe.objects.order_by(*ordering)[:2],
+                    many=True,
+                ).data
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(res.data['results'], expected)
+
+    def test_search_paginated(self):
+        """Test rank ordered pages, whose cursor reads the rank."""
+        res = self.client.get(RECIPE_URL, {'search': 'tomato',
+                                           'page_size': 2})
+        ids = [recipe['id'] for recipe in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [recipe['id'] for recipe in res.data['results']]
+
+        self.assertNotIn('search_rank', res.data['results'][0])
+        self.assertEqual(
+            sorted(ids),
+            list(Recipe.objects.order_by('id').values_list('id', flat=True)),
+        )
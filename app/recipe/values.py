@@ -0,0 +1,45 @@
+"""
+Fast read-only list path for the recipe API.
+"""
+from rest_framework.response import Response
+
+from core.metrics import serializing
+
+from recipe.serializers import ValuesRepresentation
+
+
+class ValuesListMixin:
+    """List with QuerySet.values() rows instead of model instances."""
+    # Set to ValuesRepresentation(<serializer class>) on the view. The
+    # output is the same as the serializer's, see test_values.py.
+    values_representation: ValuesRepresentation = None
+
+    def get_values_representation(self):
+        """Return the ValuesRepresentation to list with."""
+        return self.values_representation
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        representation = self.get_values_representation()
+        sources = representation.sources
+        # The cursor paginator reads the ordering fields (e.g. the
+        # search rank) from each row, so they are fetched too.
+        extra = [
+            name for name in (
+                field.lstrip('-') for field in queryset.query.order_by
+                if isinstance(field, str)
+            )
+            if name not in sources
+        ]
+        rows = queryset.values(*sources, *extra)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            with serializing():
+                data = representation.to_representation(page)
+            return self.get_paginated_response(data)
+        # Queries run outside the serialization time
+        rows = list(rows)
+        with serializing():
+            data = representation.to_representation(rows)
+        return Response(data)
@@ -1,31 +1,288 @@
 """
 Views for the recipe API."""
-from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext as _
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-from core.models import Recipe
-from recipe.serializers import RecipeSerializer
+from core.asyncviews import AsyncViewMixin
+from core.models import Recipe, RecipeStats
+from core.routers import ReplicaReadMixin
+from recipe.cache import ResponseCacheMixin
+from recipe.conditional import ConditionalGetMixin
+from recipe.export import EXPORTERS, EXPORT_FORMATS
+from recipe.filters import (
+    RecipeOrderingFilter,
+    RecipeRangeFilter,
+    RecipeSearchFilter,
+)
+from recipe.pagination import RecipeCursorPagination
+from recipe.serializers import (
+    RecipeBulkDeleteSerializer,
+    RecipeSerializer,
+    RecipeStatsSerializer,
+    ValuesRepresentation,
+)
+from recipe.signals import batch_tombstones
+from recipe.sync import InvalidSyncToken, get_changes
+from recipe.values import ValuesListMixin
+from user.authentication import CachedTokenAuthentication
 
-# ModelVeiwSet is set to specifically work with a model
-class RecipeViewSet(viewsets.ModelViewSet):
+# ModelVeiwSet is set to specifically work with a model.
+# AsyncViewMixin serves it from a coroutine, its database work in a
+# worker thread, instead of Django's one thread for sync views.
+# ReplicaReadMixin sends the reads of GET requests to a replica.
+# ConditionalGetMixin answers up to date clients with a 304 first,
+# then ResponseCacheMixin serves list/retrieve from a per-user cache,
+# and on a miss ValuesListMixin builds the list from plain rows.
+class RecipeViewSet(
+    AsyncViewMixin,
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
     """View for manage recipe APIs"""
-    serializers_class = RecipeSerializer
+    serializer_class = RecipeSerializer
+    # Delta sync must not miss changes a lagging replica doesn't have
+    # yet: its settle delay is far shorter than a replica's lag can be.
+    primary_actions = ('changes',)
+    # Same output as RecipeSerializer, for the list
+    values_representation = ValuesRepresentation(RecipeSerializer)
     # This query represent the objects that are avaialable to
     # this view set.
     queryset = Recipe.objects.all()
-    # To use endpoint we need token authentication
-    authetication_classes = [TokenAuthentication]
+    # To use endpoint we need token authentication. The cached
+    # version skips the token lookup query on repeated requests.
+    authentication_classes = [CachedTokenAuthentication]
     # Cheking that user was authenticated
     permission_classes = [IsAuthenticated]
+    # Return recipes in pages instead of the whole library at once
+    pagination_class = RecipeCursorPagination
+    # Supports range filters, ?search= and ?ordering= on the list.
+    # The pagination uses the ordering of RecipeOrderingFilter, which
+    # comes last as it may order by the search rank.
+    filter_backends = [
+        RecipeRangeFilter,
+        RecipeSearchFilter,
+        RecipeOrderingFilter,
+    ]
+
+    # ?fields=id,title limits list and detail responses to these fields
+    fields_param = 'fields'
+    sparse_fields_actions = ('list', 'retrieve')
+
+    def get_requested_fields(self):
+        """Return the field names asked for with ?fields=, or None."""
+        action = getattr(self, 'action', None)
+        if action not in self.sparse_fields_actions:
+            return None
+        param = self.request.query_params.get(self.fields_param, '')
+        fields = {name.strip() for name in param.split(',') if name.strip()}
+        if not fields:
+            return None
+
+        allowed = self.values_representation.field_names
+        unknown = fields - set(allowed)
+        if unknown:
+            raise ValidationError({self.fields_param: _(
+                'Unknown fields: {unknown}. Choose from: {allowed}.'
+            ).format(
+                unknown=', '.join(sorted(unknown)),
+                allowed=', '.join(allowed),
+            )})
+        return fields
 
     # Over writting the get query method to filter result by
     # only returning user's recipes, instead of all recipes
     def get_queryset(self):
         """Retrieve recipes for authentication user."""
-        # The order_by('-id') will filter to retunr user's recipes
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        # The order_by('-id') will filter to retunr user's recipes.
+        # The search document is only used in the WHERE clause, so we
+        # don't load it.
+        queryset = self.queryset.filter(
+            user=self.request.user,
+        ).defer('search_vector').order_by('-id')
+        # Columns that are not sent are not read either (the list only
+        # reads its values() columns already)
+        fields = self.get_requested_fields()
+        if fields is not None:
+            queryset = queryset.only(*fields)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        """Return the serializer, limited to the ?fields= asked for."""
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_values_representation(self):
+        """Return the list representation, limited to ?fields=."""
+        fields = self.get_requested_fields()
+        if fields is None:
+            return self.values_representation
+        return self.values_representation.only(fields)
+
+    # Recipes created through the API belong to the authenticated user
+    def perform_create(self, serializer):
+        """Create a new recipe."""
+        serializer.save(user=self.request.user)
+
+    # Extra endpoint: /recipes/changes/?sync_token=...
+    # Returns what changed since the client's last sync, instead of
+    # the whole library.
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """Return recipes changed or deleted since a sync token."""
+        try:
+            changes = get_changes(
+                request.user,
+                request.query_params.get('sync_token'),
+            )
+        except InvalidSyncToken:
+            raise ValidationError({'sync_token': _('Invalid sync token.')})
+
+        changes['changed'] = self.get_serializer(
+            changes['changed'],
+            many=True,
+        ).data
+        return Response(changes)
+
+    # Extra endpoint: /recipes/stats/
+    # Count, totals and averages of the user's recipes. They are read
+    # from one RecipeStats row kept up to date by a database trigger,
+    # so this never scans the recipes.
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Return the recipe totals of the authenticated user."""
+        stats = RecipeStats.objects.filter(user=request.user).first()
+        if stats is None:
+            # User never had a recipe
+            stats = RecipeStats(user=request.user)
+        return Response(RecipeStatsSerializer(stats).data)
+
+    # Extra endpoint: /recipes/bulk/
+    # POST a list of recipes to create them, PATCH a list of recipes
+    # (each with its id) to update them. The batch is validated item by
+    # item and written with one query inside one transaction: either
+    # every item is saved, or a 400 lists the errors of each item.
+    @action(detail=False, methods=['post', 'patch'])
+    def bulk(self, request):
+        """Create or update many recipes at once."""
+        if request.method == 'PATCH':
+            return self.bulk_update(request)
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save(user=self.request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, request):
+        """Update many recipes at once."""
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            partial=True,
+        )
+        if not serializer.is_valid() and \
+                not isinstance(serializer.errors, list):
+            # The batch itself is wrong (not a list, too big...)
+            raise ValidationError(serializer.errors)
+
+        ids = [_parse_id(item) for item in request.data]
+        recipes = self.get_queryset().in_bulk(
+            {recipe_id for recipe_id in ids if recipe_id is not None}
+        )
+        errors = list(serializer.errors) or [{} for _item in ids]
+        seen = set()
+        for index, (item, recipe_id) in enumerate(zip(request.data, ids)):
+            if not isinstance(item, dict):
+                # Replaces the item's own error, which can be a list
+                # (e.g. for null)
+                errors[index] = {api_settings.NON_FIELD_ERRORS_KEY: [
+                    serializer.child.error_messages['invalid'].format(
+                        datatype=type(item).__name__,
+                    ),
+                ]}
+                continue
+            if 'id' not in item:
+                error = _('This field is required.')
+            elif recipe_id is None:
+                error = _('A valid integer is required.')
+            elif recipe_id in seen:
+                # Otherwise the last item with the id would win
+                error = _('Duplicate id.')
+            elif recipe_id not in recipes:
+                error = _('Not found.')
+            else:
+                error = None
+            seen.add(recipe_id)
+            if error is not None:
+                errors[index] = {**errors[index], 'id': [error]}
+        if any(errors):
+            raise ValidationError(errors)
+
+        serializer.instance = [recipes[recipe_id] for recipe_id in ids]
+        with transaction.atomic():
+            serializer.save()
+        return Response(serializer.data)
+
+    # Extra endpoint: /recipes/bulk-delete/ with {"ids": [...]}
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        """Delete many recipes at once."""
+        serializer = RecipeBulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        with transaction.atomic():
+            recipes = self.get_queryset().filter(id__in=ids)
+            found = set(recipes.values_list('id', flat=True))
+            missing = {
+                index: [_('Not found.')]
+                for index, recipe_id in enumerate(ids)
+                if recipe_id not in found
+            }
+            if missing:
+                raise ValidationError({'ids': missing})
+            with batch_tombstones():
+                recipes.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
+    # Extra endpoint: /recipes/export/?export_format=ndjson|csv
+    # Streams the whole library as a file instead of building it in
+    # memory like the paginated list does.
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream all the user's recipes as NDJSON or CSV."""
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in EXPORTERS:
+            raise ValidationError({'export_format': _(
+                'Choose one of: {formats}.'
+            ).format(formats=', '.join(EXPORTERS))})
 
+        content_type, extension = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            EXPORTERS[export_format](self.get_queryset()),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{extension}"'
+        )
+        return response
 
 
+def _parse_id(item):
+    """Return the recipe id of a bulk update item, or None."""
+    try:
+        return int(item['id'])
+    except (KeyError, TypeError, ValueError):
+        return None
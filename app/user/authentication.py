@@ -0,0 +1,205 @@
+"""
+Authentication classes for the API.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core import prometheus
+
+
+class BaseTokenCache:
+    """
+    Base class for caches of token key -> token (with its user).
+    Keeps hit/miss counters so we can see how well the cache works.
+    """
+
+    def __init__(self, timeout=60):
+        # Seconds an entry is trusted before we read the db again
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached token for key, or None."""
+        token = self._get(key)
+        with self._stats_lock:
+            if token is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return token
+
+    def set(self, key, token):
+        """Store the token under key."""
+        raise NotImplementedError
+
+    def delete_many(self, keys):
+        """Remove the given token keys from the cache."""
+        raise NotImplementedError
+
+    def clear(self):
+        """Reset the hit/miss counters."""
+        with self._stats_lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return the hit/miss counters."""
+        with self._stats_lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def _get(self, key):
+        raise NotImplementedError
+
+
+class LocMemTokenCache(BaseTokenCache):
+    """
+    Token cache kept in the memory of the current process. Entries
+    expire after `timeout` seconds and the least recently used entry is
+    dropped once `max_size` is reached.
+    Note: invalidation only reaches the process that made the change,
+    other processes see it once the entry expires.
+    """
+
+    def __init__(self, timeout=60, max_size=10000):
+        super().__init__(timeout=timeout)
+        self.max_size = max_size
+        # key -> (expiry time, pickled token). Pickling means every
+        # request gets its own copy of the user object.
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            # Mark as most recently used
+            self._entries.move_to_end(key)
+        return pickle.loads(data)
+
+    def set(self, key, token):
+        data = pickle.dumps(token, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, data)
+            self._entries.move_to_end(key)
+            # Drop least recently used entries above the limit
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+        super().clear()
+
+    def stats(self):
+        stats = super().stats()
+        stats['size'] = len(self._entries)
+        return stats
+
+
+class DjangoTokenCache(BaseTokenCache):
+    """
+    Token cache stored in one of the caches defined in CACHES. Use a
+    shared backend (memcached, redis, ...) so invalidation reaches
+    every process.
+    """
+
+    def __init__(self, timeout=60, cache_alias='default',
+                 key_prefix='auth-token'):
+        super().__init__(timeout=timeout)
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def make_key(self, key):
+        return f'{self.key_prefix}:{key}'
+
+    def _get(self, key):
+        return self.cache.get(self.make_key(key))
+
+    def set(self, key, token):
+        self.cache.set(self.make_key(key), token, self.timeout)
+
+    def delete_many(self, keys):
+        self.cache.delete_many([self.make_key(key) for key in keys])
+
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache():
+    """Return the token cache configured in TOKEN_AUTH_CACHE."""
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                config = settings.TOKEN_AUTH_CACHE
+                backend = import_string(config['BACKEND'])
+                _token_cache = backend(**config.get('OPTIONS', {}))
+    return _token_cache
+
+
+def reset_token_cache():
+    """Forget the current token cache, e.g. after a settings change."""
+    global _token_cache
+    with _token_cache_lock:
+        _token_cache = None
+
+
+def invalidate_tokens(keys):
+    """Drop the given token keys from the token cache."""
+    keys = list(keys)
+    if keys:
+        get_token_cache().delete_many(keys)
+
+
+# Same behaviour as TokenAuthentication, but the token -> user lookup
+# (a token JOIN user query) only runs on a cache miss.
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication with a cache in front of the db lookup."""
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        token = cache.get(key)
+        prometheus.cache_lookup('auth_token', token is not None)
+        if token is None:
+            # Raises AuthenticationFailed for unknown/inactive users,
+            # so failures are never cached.
+            try:
+                user, token = super().authenticate_credentials(key)
+            except exceptions.AuthenticationFailed:
+                prometheus.auth_failure('token')
+                raise
+            cache.set(key, token)
+            return (user, token)
+
+        # Only active users are cached, and saving a user (e.g. to
+        # deactivate it) drops its tokens through user.signals. A
+        # QuerySet.update() sends no signal: call invalidate_tokens.
+        # With several processes, TOKEN_AUTH_CACHE must be shared for
+        # the invalidation to reach all of them.
+        return (token.user, token)
@@ -9,11 +9,13 @@ from django.utils.translation import gettext as _
 # library that include tool for serializer
 from rest_framework import serializers
 
+from core.metrics import SerializationTimingMixin
+
 
 # Class based of the model serializer. Allows to automatically
 # validate and save things to a specific mode that we define in
 # our serializer
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     """
     Serializer for the user object. Serializer is a way to convert
     objects to and from python objects.
@@ -0,0 +1,47 @@
+"""
+Signal handlers for the user app.
+"""
+from django.contrib.auth import get_user_model
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.routers import pin_users_to_primary
+from user.authentication import invalidate_tokens, reset_token_cache
+
+
+# A deleted (or replaced) token must stop authenticating right away
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """Remove a token from the token cache when it changes."""
+    invalidate_tokens([instance.key])
+
+
+# The cache holds a copy of the user, so any change to the user
+# (deactivation, new name, new password...) drops its tokens.
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Remove the user's tokens from the token cache."""
+    if created:
+        return
+    invalidate_tokens(
+        Token.objects.filter(user=instance).values_list('key', flat=True)
+    )
+
+
+# The profile is read from a replica, which may still have the old one
+@receiver(post_save, sender=get_user_model())
+def pin_user_to_primary(sender, instance, created, **kwargs):
+    """Send the user's reads to the primary for a while."""
+    if not created:
+        pin_users_to_primary([instance.pk])
+
+
+# Lets tests swap the cache backend with override_settings
+@receiver(setting_changed)
+def reset_token_cache_on_setting_change(sender, setting, **kwargs):
+    """Rebuild the token cache when TOKEN_AUTH_CACHE changes."""
+    if setting == 'TOKEN_AUTH_CACHE':
+        reset_token_cache()
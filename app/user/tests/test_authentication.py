@@ -0,0 +1,164 @@
+"""
+Tests for the cached token authentication.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from user.authentication import (
+    CachedTokenAuthentication,
+    LocMemTokenCache,
+    get_token_cache,
+)
+
+
+ME_URL = reverse('user:me')
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class LocMemTokenCacheTests(TestCase):
+    """Test the in-process token cache."""
+
+    def test_get_missing_key_counts_miss(self):
+        """Test a missing key returns None and counts a miss."""
+        cache = LocMemTokenCache()
+
+        self.assertIsNone(cache.get('missing'))
+        self.assertEqual(cache.stats(), {'hits': 0, 'misses': 1, 'size': 0})
+
+    def test_get_returns_copy_and_counts_hit(self):
+        """Test a cached value is returned as a copy and counts a hit."""
+        cache = LocMemTokenCache()
+        value = {'user': 'a'}
+        cache.set('key', value)
+
+        cached = cache.get('key')
+
+        self.assertEqual(cached, value)
+        self.assertIsNot(cached, value)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_least_recently_used_entry_evicted(self):
+        """Test the oldest unused entry is dropped when full."""
+        cache = LocMemTokenCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        # Reading 'a' makes 'b' the least recently used entry
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    @patch('user.authentication.time.monotonic')
+    def test_entry_expires_after_timeout(self, patched_monotonic):
+        """Test entries are not returned after their timeout."""
+        cache = LocMemTokenCache(timeout=10)
+        patched_monotonic.return_value = 100
+        cache.set('key', 1)
+
+        patched_monotonic.return_value = 109
+        self.assertEqual(cache.get('key'), 1)
+        patched_monotonic.return_value = 110
+        self.assertIsNone(cache.get('key'))
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating with a cached token."""
+
+    def setUp(self):
+        get_token_cache().clear()
+        self.user = create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_second_lookup_skips_db(self):
+        """Test a cached token authenticates without queries."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token.key, self.token.key)
+        self.assertEqual(get_token_cache().stats()['hits'], 1)
+
+    def test_invalid_token_not_cached(self):
+        """Test unknown tokens fail and are looked up every time."""
+        for _ in range(2):
+            with self.assertRaises(AuthenticationFailed):
+                self.auth.authenticate_credentials('invalid')
+
+        self.assertEqual(get_token_cache().stats()['hits'], 0)
+
+    def test_deleted_token_invalidated(self):
+        """Test deleting a token stops it from authenticating."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_deactivated_user_invalidated(self):
+        """Test deactivating a user stops its tokens authenticating."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_updated_user_reloaded(self):
+        """Test changes to the user are seen on the next request."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        self.user.name = 'New Name'
+        self.user.save()
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user.name, 'New Name')
+
+    @override_settings(TOKEN_AUTH_CACHE={
+        'BACKEND': 'user.authentication.DjangoTokenCache',
+    })
+    def test_django_cache_backend(self):
+        """Test tokens can be cached in Django's cache framework."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, _ = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_api_request_uses_cache(self):
+        """Test repeated API requests reuse the cached token."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        client.get(ME_URL)
+        res = client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(get_token_cache().stats()['hits'], 1)
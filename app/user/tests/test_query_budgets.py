@@ -0,0 +1,56 @@
+"""
+Tests for the query budgets of the user endpoints.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.testing import QueryBudgetMixin
+
+
+# Cheap hashing, the budgets are about queries
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class UserQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test the user endpoints stay within their query budgets."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_create_user(self):
+        """Test signing up stays within budget."""
+        res = self.client.post(reverse('user:create'), {
+            'email': 'user@example.com',
+            'password': 'testpass123',
+            'name': 'Test Name',
+        })
+
+        self.assertEqual(res.status_code, 201)
+        self.assertWithinQueryBudget(res)
+
+    def test_token_and_profile(self):
+        """Test logging in, reading and updating the profile."""
+        get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        res = self.client.post(reverse('user:token'), {
+            'email': 'user@example.com',
+            'password': 'testpass123',
+        })
+        self.assertEqual(res.status_code, 200)
+        self.assertWithinQueryBudget(res)
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {res.data["token"]}',
+        )
+        for response in (
+            self.client.get(reverse('user:me')),
+            self.client.patch(reverse('user:me'), {'name': 'New Name'}),
+        ):
+            with self.subTest(method=response.request_metrics.endpoint):
+                self.assertEqual(response.status_code, 200)
+                self.assertWithinQueryBudget(response)
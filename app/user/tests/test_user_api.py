@@ -5,6 +5,7 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
+import msgpack
 from rest_framework.test import APIClient
 from rest_framework import status
 
@@ -100,6 +101,21 @@ class PublicUserApiTest(TestCase):
         # Testing if we get 200s
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_create_token_msgpack(self):
+        """Test a token can be requested and sent as MessagePack."""
+        create_user(email='test@example.com', password='testpass123')
+        payload = {'email': 'test@example.com', 'password': 'testpass123'}
+
+        res = self.client.post(
+            TOKEN_URL,
+            msgpack.packb(payload),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('token', msgpack.unpackb(res.content))
+
     def test_create_token_bad_credentials(self):
         """Test returns error if credentials invalid."""
         # Creaating user
@@ -6,7 +6,7 @@ Views for the user API
 # that we can configure for our views. Also give us the
 # option of overwritting behavio.
 from django.shortcuts import render
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 # Serializer we created
@@ -14,6 +14,10 @@ from user.serializers import(
     UserSerializer,
     AuthTokenSerializer,
 )
+from user.authentication import CachedTokenAuthentication
+from core.asyncviews import AsyncViewMixin
+from core.hashing import hashing_slot
+from core.routers import ReplicaReadMixin
 
 # CreateAPIView handle post request (creating obj in db)
 class CreateUserView(generics.CreateAPIView):
@@ -23,6 +27,12 @@ class CreateUserView(generics.CreateAPIView):
     # serializer we created.
     serializer_class = UserSerializer
 
+    # Creating the user hashes its password: wait for a hashing slot,
+    # or answer 429 (see core.hashing)
+    def post(self, request, *args, **kwargs):
+        with hashing_slot():
+            return super().post(request, *args, **kwargs)
+
     # Connecting URL to the view
 
 # This classe is based of ObtainAuthToken
@@ -34,18 +44,33 @@ class CreateTokenView(ObtainAuthToken):
     # Optional: it uses the default render of classes for
     # this obtain or token view
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    # ObtainAuthToken only reads form and JSON bodies, accept every
+    # format of the API (e.g. MessagePack) instead.
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+
+    # Authenticating checks the password hash: wait for a hashing slot,
+    # or answer 429 (see core.hashing)
+    def post(self, request, *args, **kwargs):
+        with hashing_slot():
+            return super().post(request, *args, **kwargs)
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+# GETs are served from a read replica, if any. AsyncViewMixin serves
+# it from a coroutine, see core.asyncviews.
+class ManageUserView(
+    AsyncViewMixin,
+    ReplicaReadMixin,
+    generics.RetrieveUpdateAPIView,
+):
     """Manage the authenticated user."""
     # Set user serializer
     serializer_class = UserSerializer
-    # Set authent. using token auth
-    authentication_classes = [authentication.TokenAuthentication]
+    # Set authent. using token auth (cached token -> user lookup)
+    authentication_classes = [CachedTokenAuthentication]
     # Set the user's permission: user must be authenticated
     permission_classes = [permissions.IsAuthenticated]
 
     # Overwriting the get function, we just retrieve the user object
     def get_object(self):
         """Retrieve and return the authenticated user."""
-        return self.request.user
\ No newline at end of file
+        return self.request.user